@@ -8,7 +8,7 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.database import Base
-from app.models import User, PDF, Question, Attempt
+from app.models import User, PDF, Question, Attempt, IngestJob, StatsRollup, ReviewState, Chunk, RevokedToken
 
 config = context.config
 if config.config_file_name is not None:
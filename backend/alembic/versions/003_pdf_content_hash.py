@@ -0,0 +1,25 @@
+"""Content hash on pdfs for upload dedup
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "003"
+down_revision: Union[str, None] = "002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("pdfs", sa.Column("content_hash", sa.String(64), nullable=True))
+    op.create_index(op.f("ix_pdfs_content_hash"), "pdfs", ["content_hash"])
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_pdfs_content_hash"), table_name="pdfs")
+    op.drop_column("pdfs", "content_hash")
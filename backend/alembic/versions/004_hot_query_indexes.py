@@ -0,0 +1,47 @@
+"""Indexes for quiz selection, stats, PDF listing and cascades
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+from alembic import op
+
+revision: str = "004"
+down_revision: Union[str, None] = "003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    # Quiz selection and stats: questions of one PDF, with difficulty for the stats GROUP BY
+    ("ix_questions_pdf_id_id", "questions", ["pdf_id", "id"], ["difficulty"]),
+    # Per-question attempt lookups for one user; is_correct included so they are index-only
+    ("ix_attempts_user_id_question_id", "attempts", ["user_id", "question_id"], ["is_correct"]),
+    # ON DELETE CASCADE from questions
+    ("ix_attempts_question_id", "attempts", ["question_id"], None),
+    # GET /pdfs/ ordered by upload time
+    ("ix_pdfs_user_id_uploaded_at", "pdfs", ["user_id", "uploaded_at"], None),
+    # Dedup lookup join and ON DELETE SET NULL from pdfs
+    ("ix_ingest_jobs_pdf_id", "ingest_jobs", ["pdf_id"], None),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction; build without locking writes on live tables
+    with op.get_context().autocommit_block():
+        for name, table, columns, include in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_include=include or [],
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
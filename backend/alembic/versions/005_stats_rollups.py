@@ -0,0 +1,44 @@
+"""Per (user, pdf, difficulty) stats rollups, backfilled from attempts
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "005"
+down_revision: Union[str, None] = "004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "stats_rollups",
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("pdf_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("difficulty", sa.String(20), nullable=False),
+        sa.Column("total", sa.Integer(), nullable=False),
+        sa.Column("correct", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["pdf_id"], ["pdfs.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "pdf_id", "difficulty"),
+    )
+    op.create_index("ix_stats_rollups_pdf_id", "stats_rollups", ["pdf_id"])
+    op.execute(
+        """
+        INSERT INTO stats_rollups (user_id, pdf_id, difficulty, total, correct)
+        SELECT a.user_id, q.pdf_id, q.difficulty, count(*), sum(a.is_correct::int)
+        FROM attempts a JOIN questions q ON q.id = a.question_id
+        GROUP BY a.user_id, q.pdf_id, q.difficulty
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_stats_rollups_pdf_id", table_name="stats_rollups")
+    op.drop_table("stats_rollups")
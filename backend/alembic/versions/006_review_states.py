@@ -0,0 +1,62 @@
+"""Spaced-repetition review state per (user, question), seeded from attempts
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "006"
+down_revision: Union[str, None] = "005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "review_states",
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("question_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("pdf_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("box", sa.Integer(), nullable=False),
+        sa.Column("reps", sa.Integer(), nullable=False),
+        sa.Column("lapses", sa.Integer(), nullable=False),
+        sa.Column("due_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_reviewed_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["question_id"], ["questions.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "question_id"),
+    )
+    op.create_index(op.f("ix_review_states_question_id"), "review_states", ["question_id"])
+    op.create_index("ix_review_states_user_id_pdf_id_due_at", "review_states", ["user_id", "pdf_id", "due_at"])
+    # Seed from each question's latest attempt: wrong -> box 1 due in 10 minutes, right -> box 2 due in a day
+    op.execute(
+        """
+        INSERT INTO review_states (user_id, question_id, pdf_id, box, reps, lapses, due_at, last_reviewed_at)
+        SELECT user_id, question_id, pdf_id,
+               CASE WHEN is_correct THEN 2 ELSE 1 END,
+               reps, lapses,
+               reviewed_at + CASE WHEN is_correct THEN interval '1 day' ELSE interval '10 minutes' END,
+               reviewed_at
+        FROM (
+            SELECT a.user_id, a.question_id, q.pdf_id, a.is_correct,
+                   coalesce(a.attempted_at, now()) AS reviewed_at,
+                   count(*) OVER w AS reps,
+                   count(*) FILTER (WHERE NOT a.is_correct) OVER w AS lapses,
+                   row_number() OVER (w ORDER BY a.attempted_at DESC NULLS LAST) AS rn
+            FROM attempts a JOIN questions q ON q.id = a.question_id
+            WINDOW w AS (PARTITION BY a.user_id, a.question_id)
+        ) latest
+        WHERE rn = 1
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_review_states_user_id_pdf_id_due_at", table_name="review_states")
+    op.drop_index(op.f("ix_review_states_question_id"), table_name="review_states")
+    op.drop_table("review_states")
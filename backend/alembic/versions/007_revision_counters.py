@@ -0,0 +1,27 @@
+"""Revision counters on users and pdfs for ETags
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "007"
+down_revision: Union[str, None] = "006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("users", sa.Column("pdfs_revision", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("users", sa.Column("attempts_revision", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("pdfs", sa.Column("revision", sa.Integer(), nullable=False, server_default="0"))
+
+
+def downgrade() -> None:
+    op.drop_column("pdfs", "revision")
+    op.drop_column("users", "attempts_revision")
+    op.drop_column("users", "pdfs_revision")
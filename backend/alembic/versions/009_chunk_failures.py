@@ -0,0 +1,27 @@
+"""Per-chunk generation attempts and errors, failed chunk count on ingest jobs
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "009"
+down_revision: Union[str, None] = "008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("chunks", sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("chunks", sa.Column("last_error", sa.Text(), nullable=True))
+    op.add_column("ingest_jobs", sa.Column("chunks_failed", sa.Integer(), nullable=False, server_default="0"))
+
+
+def downgrade() -> None:
+    op.drop_column("ingest_jobs", "chunks_failed")
+    op.drop_column("chunks", "last_error")
+    op.drop_column("chunks", "attempts")
@@ -0,0 +1,40 @@
+"""Random sampling key on questions, cross-PDF due-queue index
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "010"
+down_revision: Union[str, None] = "009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    # New questions in random order: range scan from a random pivot, (rand_key, id) as the keyset
+    ("ix_questions_pdf_id_rand_key", "questions", ["pdf_id", "rand_key", "id"]),
+    # GET /quiz/review: one user's due queue across all their PDFs, keyset on (due_at, question_id)
+    ("ix_review_states_user_id_due_at", "review_states", ["user_id", "due_at", "question_id"]),
+]
+
+
+def upgrade() -> None:
+    # random() is volatile, so every existing row gets its own key (the table is rewritten once)
+    op.add_column(
+        "questions",
+        sa.Column("rand_key", sa.Float(), nullable=False, server_default=sa.text("random()")),
+    )
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+    op.drop_column("questions", "rand_key")
@@ -0,0 +1,26 @@
+"""Lease (owner and heartbeat) on ingest jobs
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "012"
+down_revision: Union[str, None] = "011"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("ingest_jobs", sa.Column("lease_owner", postgresql.UUID(as_uuid=True), nullable=True))
+    op.add_column("ingest_jobs", sa.Column("heartbeat_at", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("ingest_jobs", "heartbeat_at")
+    op.drop_column("ingest_jobs", "lease_owner")
@@ -0,0 +1,28 @@
+"""Maintenance commands: python -m app.cli <command>."""
+import argparse
+
+from app.database import SessionLocal
+from app.services.stats import backfill_rollups
+
+
+def _backfill_stats(args: argparse.Namespace) -> None:
+    db = SessionLocal()
+    try:
+        written = backfill_rollups(db)
+    finally:
+        db.close()
+    print(f"Rebuilt {written} stats rollup rows from attempts")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("backfill-stats", help="Rebuild stats_rollups from the attempts table").set_defaults(
+        func=_backfill_stats
+    )
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
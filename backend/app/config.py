@@ -4,12 +4,63 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     database_url: str = "postgresql://quizuser:quizpass@db:5432/quiztutor"
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_statement_cache_size: int = 100
     secret_key: str = "your-strong-secret-key-here"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 1440
+    stream_token_expire_seconds: int = 60  # ?token= for one PDF's event stream; only checked on connect
+    token_cache_size: int = 10000
+    token_revocation_sync_seconds: float = 5.0  # how stale another process's view of logouts can be
+    bcrypt_rounds: int = 12
+    bcrypt_workers: int = 2
+    bcrypt_max_pending: int = 32
+    response_cache_size: int = 1000  # 0 disables; ETag/304 handling stays on
+    quiz_etag_bucket_seconds: int = 60
+    profile_token: str = ""  # admin secret for the X-Profile header; empty disables on-demand profiling
+    profile_sample_rate: float = 0.0  # fraction of requests profiled without the header
+    profile_dir: str = "profiles"
+    profile_query_warn: int = 50  # log requests issuing more SQL statements than this; 0 disables
     gemini_api_key: str = ""
+    log_level: str = "INFO"
     upload_dir: str = "uploads"
+    max_upload_bytes: int = 25 * 1024 * 1024
+    upload_block_size: int = 1024 * 1024
     max_chunk_tokens: int = 1500
+    chunk_overlap_tokens: int = 50
+    chunk_tokenizer: str = "regex"  # or a tiktoken encoding, e.g. cl100k_base
+    extract_workers: int = 2
+    extract_pages_per_task: int = 16
+    ingest_workers: int = 2
+    ingest_max_pending_chunks: int = 4  # chunks parsed ahead of / in flight to the LLM per job
+    ingest_initial_questions: int = 12  # generated at upload; the rest on demand via POST /quiz/generate
+    chunk_claim_timeout_seconds: int = 600
+    ingest_lease_seconds: int = 120  # a running job with no heartbeat for this long is taken over
+    sse_keepalive_seconds: float = 15.0
+    groq_base_url: str = ""  # e.g. http://localhost:9000 for benchmarks/fake_llm.py
+    llm_tpm_limit: int = 6000
+    llm_rpm_limit: int = 30
+    llm_process_count: int = 1  # uvicorn workers sharing one API key; each gets 1/N of the budget
+    llm_output_tokens_per_question: int = 120
+    llm_max_retries: int = 3
+    llm_default_retry_after: float = 10.0
+    llm_retry_base_delay: float = 1.0  # transient errors back off base * 2^attempt seconds (jittered)
+    llm_retry_max_delay: float = 30.0
+    llm_max_concurrency: int = 8
+    llm_max_connections: int = 20
+    llm_timeout_seconds: float = 60.0
+    llm_cache_enabled: bool = True
+    llm_cache_path: str = "cache/llm_cache.sqlite3"
+    llm_cache_max_bytes: int = 256 * 1024 * 1024
+    llm_cache_max_age_seconds: int = 30 * 24 * 3600
+    dedup_enabled: bool = True
+    dedup_threshold: float = 0.6  # estimated Jaccard similarity of word 3-shingles
+    dedup_num_perm: int = 64
+    dedup_shingle_size: int = 3
 
     model_config = {"env_file": ".env", "extra": "ignore"}
 
@@ -0,0 +1,67 @@
+"""Shared FastAPI dependencies."""
+from uuid import UUID
+
+from fastapi import Header, HTTPException, Query
+
+from app.config import settings
+from app.services.auth import STREAM_SCOPE
+from app.services.token_revocation import sync_revocations
+from app.utils.jwt import decode_token
+from app.utils.token_cache import TokenCache
+
+token_cache = TokenCache(settings.token_cache_size)
+
+
+def bearer_token(authorization: str | None = Header(None)) -> str:
+    if not authorization or not authorization.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return authorization.split()[1]
+
+
+async def verify_token(token: str) -> dict:
+    """Decode a token, skipping signature verification for ones seen recently.
+
+    Logouts from other processes are picked up within TOKEN_REVOCATION_SYNC_SECONDS.
+    """
+    await sync_revocations(token_cache)
+    payload = token_cache.get(token)
+    if payload is None:
+        if token_cache.is_revoked(token):
+            raise HTTPException(status_code=401, detail="Token revoked")
+        payload = decode_token(token)
+        # Tokens without exp could never be revoked for good; none are issued, so none are accepted
+        if not payload or "sub" not in payload or "exp" not in payload:
+            raise HTTPException(status_code=401, detail="Invalid token")
+        token_cache.put(token, payload)
+    return payload
+
+
+async def _user_id(token: str, scope: str | None = None, pdf_id: UUID | None = None) -> UUID:
+    """The token's user; `scope` (and the PDF it names) must match exactly, so a scoped token is only
+    good for the one thing it was issued for and a full access token never goes in a URL."""
+    payload = await verify_token(token)
+    if payload.get("scope") != scope or (scope and payload.get("pdf") != str(pdf_id)):
+        raise HTTPException(status_code=401, detail="Invalid token")
+    try:
+        return UUID(payload["sub"])
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+
+async def get_current_user_id(authorization: str | None = Header(None)) -> UUID:
+    return await _user_id(bearer_token(authorization))
+
+
+async def get_stream_user_id(
+    pdf_id: UUID,
+    authorization: str | None = Header(None),
+    token: str | None = Query(None),
+) -> UUID:
+    """Like get_current_user_id, but also takes ?token=: browsers cannot set headers on an EventSource.
+
+    Query strings end up in access logs, so ?token= only accepts a short-lived stream token for this
+    PDF (POST /pdfs/{pdf_id}/events-token), never an access token.
+    """
+    if not authorization and token:
+        return await _user_id(token, STREAM_SCOPE, pdf_id)
+    return await _user_id(bearer_token(authorization))
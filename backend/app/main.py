@@ -1,13 +1,49 @@
-"""FastAPI app entry, CORS, router registration."""
+"""FastAPI app entry, CORS, router registration, /metrics."""
 from dotenv import load_dotenv
 load_dotenv()
 
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.config import settings
+from app.database import async_engine
+from app.logging_config import setup_logging, stop_logging
+from app.metrics import render
+from app.middleware.metrics import RequestMetricsMiddleware
+from app.middleware.profiling import ProfilingMiddleware
+from app.middleware.upload_limit import UploadSizeLimitMiddleware
 from app.routers import auth, pdfs, quiz, stats
+from app.services.auth import shutdown_hash_pool
+from app.services.groq import close_client
+from app.services.ingest import start_workers, stop_workers
+from app.services.pdf_parser import shutdown_extract_pool
+from app.utils import query_stats
+
+
+setup_logging(settings.log_level)
+query_stats.install(async_engine.sync_engine)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await start_workers()
+    yield
+    await stop_workers()
+    await close_client()
+    shutdown_extract_pool()
+    shutdown_hash_pool()
+    stop_logging()
+
 
-app = FastAPI(title="AI Quiz Tutor API", version="1.0.0")
+app = FastAPI(title="AI Quiz Tutor API", version="1.0.0", lifespan=lifespan)
+
+app.add_middleware(UploadSizeLimitMiddleware, max_bytes=settings.max_upload_bytes, paths=("/pdfs/upload",))
+
+app.add_middleware(ProfilingMiddleware)
+
+app.add_middleware(RequestMetricsMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -25,4 +61,10 @@ app.include_router(stats.router, prefix="/stats", tags=["stats"])
 
 @app.get("/")
 def root():
-    return {"message": "AI Quiz Tutor API", "docs": "/docs"}
\ No newline at end of file
+    return {"message": "AI Quiz Tutor API", "docs": "/docs"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    body, content_type = render()
+    return Response(content=body, media_type=content_type)
\ No newline at end of file
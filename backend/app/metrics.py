@@ -0,0 +1,48 @@
+"""Prometheus metrics: per-stage pipeline timings, pipeline counters, HTTP latency by route."""
+import os
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# stage: upload_read | upload_save | extract | chunk | llm_call | json_parse | db_insert
+STAGE_SECONDS = Histogram("quiz_stage_seconds", "Time spent in each pipeline stage", ["stage"], buckets=STAGE_BUCKETS)
+CHUNKS = Counter("quiz_chunks_total", "Chunks produced by the chunker")
+QUESTIONS_SAVED = Counter("quiz_questions_saved_total", "Questions stored")
+QUESTIONS_DROPPED = Counter("quiz_questions_dropped_total", "Questions dropped as near-duplicates")
+PARSE_FAILURES = Counter("quiz_llm_parse_failures_total", "LLM responses with no usable JSON")
+LLM_TOKENS = Counter("quiz_llm_tokens_total", "Tokens reported by the LLM API", ["kind"])
+LLM_RATE_LIMITED = Counter("quiz_llm_rate_limited_total", "429 responses from the LLM API")
+LLM_ERRORS = Counter("quiz_llm_errors_total", "LLM calls that failed for reasons other than rate limiting")
+LLM_CACHE = Counter("quiz_llm_cache_requests_total", "LLM response cache lookups", ["result"])
+LLM_CACHE_BYTES = Gauge("quiz_llm_cache_bytes", "Size of the cached LLM responses", multiprocess_mode="max")
+REQUEST_SECONDS = Histogram(
+    "quiz_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=STAGE_BUCKETS,
+)
+
+DB_QUERIES = Histogram(
+    "quiz_http_request_db_queries",
+    "SQL statements issued per request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 250),
+)
+DB_SECONDS = Histogram(
+    "quiz_http_request_db_seconds",
+    "Time spent in SQL per request",
+    ["method", "route"],
+    buckets=STAGE_BUCKETS,
+)
+
+
+def render() -> tuple[bytes, str]:
+    """Exposition for GET /metrics; aggregates all uvicorn workers when PROMETHEUS_MULTIPROC_DIR is set."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,137 @@
+"""Opt-in request profiling (admin header or sampling) plus per-request SQL query count and time."""
+import asyncio
+import cProfile
+import hmac
+import json
+import logging
+import os
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.metrics import DB_QUERIES, DB_SECONDS
+from app.utils import query_stats
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile"
+
+# cProfile hooks the whole thread, so only one request is profiled at a time; the rest run unprofiled
+_profiling = False
+# HTTP requests in progress, and the most seen while the current profile was recording
+_in_flight = 0
+_peak_in_flight = 0
+
+
+def _is_admin(scope: Scope) -> bool:
+    token = Headers(scope=scope).get(PROFILE_HEADER)
+    return bool(token and settings.profile_token and hmac.compare_digest(token, settings.profile_token))
+
+
+def _profile_reason(scope: Scope, admin: bool) -> str | None:
+    if admin:
+        return "header"
+    if settings.profile_sample_rate > 0 and random.random() < settings.profile_sample_rate:
+        return "sample"
+    return None
+
+
+def _save(profile_id: str, profiler: cProfile.Profile, meta: dict[str, Any]) -> None:
+    """Write <id>.prof (open with pstats or snakeviz) and <id>.json with the request metadata."""
+    os.makedirs(settings.profile_dir, exist_ok=True)
+    base = os.path.join(settings.profile_dir, profile_id)
+    profiler.dump_stats(base + ".prof")
+    with open(base + ".json", "w") as f:
+        json.dump(meta, f, indent=2, default=str)
+
+
+class ProfilingMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        global _profiling, _in_flight, _peak_in_flight
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        _in_flight += 1
+        if _profiling:
+            _peak_in_flight = max(_peak_in_flight, _in_flight)
+        queries = query_stats.start()
+        admin = _is_admin(scope)
+        reason = _profile_reason(scope, admin)
+        profiler = None
+        profile_id = None
+        others_at_start = 0
+        if reason and not _profiling:
+            _profiling = True
+            others_at_start = _in_flight - 1
+            _peak_in_flight = _in_flight
+            profiler = cProfile.Profile()
+            profile_id = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        started_at = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                # Query counts and timings are internal; only the admin token or a profiled request sees them
+                if admin or profile_id:
+                    headers = MutableHeaders(scope=message)
+                    # Queries issued before the response started; streamed bodies may add more
+                    headers.append("Server-Timing", f'db;dur={queries.seconds * 1000:.1f};desc="{queries.count} queries"')
+                    if profile_id:
+                        headers.append("X-Profile-Id", profile_id)
+            await send(message)
+
+        try:
+            if profiler:
+                profiler.enable()
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _in_flight -= 1
+            if profiler:
+                profiler.disable()
+                _profiling = False
+            elapsed = time.perf_counter() - start
+            route = getattr(scope.get("route"), "path", "unmatched")
+            DB_QUERIES.labels(scope["method"], route).observe(queries.count)
+            DB_SECONDS.labels(scope["method"], route).observe(queries.seconds)
+            if settings.profile_query_warn and queries.count > settings.profile_query_warn:
+                logger.warning(
+                    "Request issued many SQL queries",
+                    extra={"route": route, "queries": queries.count, "top_statements": queries.top(3)},
+                )
+            if profiler:
+                meta = {
+                    "id": profile_id,
+                    "reason": reason,
+                    "method": scope["method"],
+                    "route": route,
+                    "path": scope["path"],
+                    "status": status,
+                    "started_at": started_at,
+                    "duration_ms": round(elapsed * 1000, 2),
+                    "db_queries": queries.count,
+                    "db_ms": round(queries.seconds * 1000, 2),
+                    "top_statements": [
+                        {"statement": stmt[:500], "count": n} for stmt, n in queries.top(10)
+                    ],
+                    # cProfile records the whole event-loop thread, not just this request
+                    "concurrent_requests": {"at_start": others_at_start, "max": _peak_in_flight - 1},
+                    "note": "Functions in the .prof include work from the concurrent requests above."
+                    if _peak_in_flight > 1 else "No other request ran while this one was profiled.",
+                }
+                try:
+                    await asyncio.to_thread(_save, profile_id, profiler, meta)
+                    logger.info("Request profiled", extra={k: meta[k] for k in ("id", "route", "duration_ms")})
+                except OSError:
+                    logger.exception("Could not write request profile", extra={"id": profile_id})
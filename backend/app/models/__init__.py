@@ -2,5 +2,10 @@ from app.models.user import User
 from app.models.pdf import PDF
 from app.models.question import Question
 from app.models.attempt import Attempt
+from app.models.ingest_job import IngestJob
+from app.models.stats_rollup import StatsRollup
+from app.models.review_state import ReviewState
+from app.models.chunk import Chunk
+from app.models.revoked_token import RevokedToken
 
-__all__ = ["User", "PDF", "Question", "Attempt"]
+__all__ = ["User", "PDF", "Question", "Attempt", "IngestJob", "StatsRollup", "ReviewState", "Chunk", "RevokedToken"]
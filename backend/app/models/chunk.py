@@ -0,0 +1,27 @@
+"""Chunk ORM model: extracted text persisted at upload, turned into questions on demand."""
+import uuid
+from sqlalchemy import Column, String, Integer, Text, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class Chunk(Base):
+    __tablename__ = "chunks"
+    __table_args__ = (
+        Index("ix_chunks_pdf_id_seq", "pdf_id", "seq", unique=True),
+        # The claim query: next unused chunks of a PDF, in document order
+        Index("ix_chunks_pdf_id_status_seq", "pdf_id", "status", "seq"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    pdf_id = Column(UUID(as_uuid=True), ForeignKey("pdfs.id", ondelete="CASCADE"), nullable=False)
+    seq = Column(Integer, nullable=False)  # position in the document
+    text = Column(Text, nullable=False)
+    status = Column(String(20), nullable=False, default="pending")  # pending | generating | done | failed
+    questions_count = Column(Integer, nullable=False, default=0)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")  # generation runs started
+    last_error = Column(Text, nullable=True)
+    claimed_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
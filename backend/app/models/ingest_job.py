@@ -0,0 +1,29 @@
+"""IngestJob ORM model."""
+import uuid
+from sqlalchemy import Column, String, Integer, Text, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class IngestJob(Base):
+    __tablename__ = "ingest_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    pdf_id = Column(UUID(as_uuid=True), ForeignKey("pdfs.id", ondelete="SET NULL"), nullable=True, index=True)
+    filename = Column(String(255), nullable=False)
+    file_path = Column(String(512), nullable=False)
+    stage = Column(String(20), nullable=False, default="queued", index=True)  # queued | extracting | generating | done | failed
+    chunks_total = Column(Integer, nullable=False, default=0)
+    chunks_done = Column(Integer, nullable=False, default=0)
+    chunks_failed = Column(Integer, nullable=False, default=0, server_default="0")
+    questions_saved = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    # Set by the process running the job and refreshed while it runs; other processes only recover
+    # an extracting/generating job once its heartbeat is older than INGEST_LEASE_SECONDS
+    lease_owner = Column(UUID(as_uuid=True), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
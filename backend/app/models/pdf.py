@@ -1,6 +1,6 @@
 """PDF ORM model."""
 import uuid
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -10,12 +10,17 @@ from app.database import Base
 
 class PDF(Base):
     __tablename__ = "pdfs"
+    __table_args__ = (
+        Index("ix_pdfs_user_id_uploaded_at", "user_id", "uploaded_at"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     filename = Column(String(255), nullable=False)
     chunk_count = Column(Integer, nullable=False)
+    content_hash = Column(String(64), nullable=True, index=True)  # sha256 of the uploaded bytes
     uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
+    revision = Column(Integer, nullable=False, default=0, server_default="0")  # bumped when its questions change
 
     user = relationship("User", back_populates="pdfs")
     questions = relationship("Question", back_populates="pdf", cascade="all, delete-orphan")
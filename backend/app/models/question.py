@@ -1,6 +1,6 @@
 """Question ORM model."""
 import uuid
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, String, Text, Float, DateTime, ForeignKey, Index, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -10,6 +10,11 @@ from app.database import Base
 
 class Question(Base):
     __tablename__ = "questions"
+    __table_args__ = (
+        Index("ix_questions_pdf_id_id", "pdf_id", "id", postgresql_include=["difficulty"]),
+        # Random sampling without ORDER BY random(): range scan from a random pivot
+        Index("ix_questions_pdf_id_rand_key", "pdf_id", "rand_key", "id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     pdf_id = Column(UUID(as_uuid=True), ForeignKey("pdfs.id", ondelete="CASCADE"), nullable=False)
@@ -18,6 +23,7 @@ class Question(Base):
     answer = Column(String(1), nullable=False)  # A | B | C | D
     explanation = Column(Text, nullable=False)
     difficulty = Column(String(20), nullable=False)  # easy | medium | hard
+    rand_key = Column(Float, nullable=False, server_default=text("random()"))  # uniform in [0, 1)
 
     pdf = relationship("PDF", back_populates="questions")
     attempts = relationship("Attempt", back_populates="question", cascade="all, delete-orphan")
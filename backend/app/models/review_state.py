@@ -0,0 +1,26 @@
+"""ReviewState ORM model: per-user spaced-repetition state of one question."""
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.database import Base
+
+
+class ReviewState(Base):
+    __tablename__ = "review_states"
+    __table_args__ = (
+        # Due queue: range scan of one user's items for one PDF ordered by due time
+        Index("ix_review_states_user_id_pdf_id_due_at", "user_id", "pdf_id", "due_at"),
+        # Cross-PDF review feed, keyset-paginated on (due_at, question_id)
+        Index("ix_review_states_user_id_due_at", "user_id", "due_at", "question_id"),
+    )
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    question_id = Column(
+        UUID(as_uuid=True), ForeignKey("questions.id", ondelete="CASCADE"), primary_key=True, index=True
+    )
+    pdf_id = Column(UUID(as_uuid=True), nullable=False)  # denormalized from the question for the due queue
+    box = Column(Integer, nullable=False, default=1)  # Leitner box 1..5
+    reps = Column(Integer, nullable=False, default=0)
+    lapses = Column(Integer, nullable=False, default=0)
+    due_at = Column(DateTime(timezone=True), nullable=False)
+    last_reviewed_at = Column(DateTime(timezone=True), nullable=False)
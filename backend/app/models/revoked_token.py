@@ -0,0 +1,17 @@
+"""RevokedToken ORM model: logged-out JWTs, shared by every process until they expire."""
+from sqlalchemy import Column, String, DateTime, Index
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+    __table_args__ = (
+        # Incremental sync: rows revoked since a process last looked
+        Index("ix_revoked_tokens_revoked_at", "revoked_at"),
+    )
+
+    token_digest = Column(String(64), primary_key=True)  # sha256 of the token; the token itself is not stored
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    revoked_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
@@ -0,0 +1,15 @@
+"""StatsRollup ORM model: per (user, pdf, difficulty) attempt counters."""
+from sqlalchemy import Column, String, Integer, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.database import Base
+
+
+class StatsRollup(Base):
+    __tablename__ = "stats_rollups"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    pdf_id = Column(UUID(as_uuid=True), ForeignKey("pdfs.id", ondelete="CASCADE"), primary_key=True, index=True)
+    difficulty = Column(String(20), primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+    correct = Column(Integer, nullable=False, default=0)
@@ -1,6 +1,6 @@
 """User ORM model."""
 import uuid
-from sqlalchemy import Column, String, DateTime
+from sqlalchemy import Column, String, Integer, DateTime
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -15,6 +15,9 @@ class User(Base):
     email = Column(String(255), unique=True, nullable=False, index=True)
     hashed_password = Column(String(255), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Change markers for conditional GETs: bumped whenever the PDF list / attempt history changes
+    pdfs_revision = Column(Integer, nullable=False, default=0, server_default="0")
+    attempts_revision = Column(Integer, nullable=False, default=0, server_default="0")
 
     pdfs = relationship("PDF", back_populates="user", cascade="all, delete-orphan")
     attempts = relationship("Attempt", back_populates="user", cascade="all, delete-orphan")
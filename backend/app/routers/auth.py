@@ -1,32 +1,68 @@
-"""POST /auth/register, POST /auth/login."""
+"""POST /auth/register, POST /auth/login, POST /auth/logout, GET /auth/token-cache, GET /auth/hash-pool."""
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
+from app.dependencies import bearer_token, get_current_user_id, token_cache, verify_token
 from app.models import User
 from app.schemas.user import UserCreate, UserLogin, Token
-from app.services.auth import hash_password, verify_password, get_token_for_user
+from app.services.auth import (
+    HashPoolBusy, hash_password_async, verify_and_update_async, get_token_for_user, hash_pool_stats,
+)
+from app.services.token_revocation import revoke_token
 
 router = APIRouter()
 
 
+def _busy(e: HashPoolBusy) -> HTTPException:
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+
 @router.post("/register", response_model=Token)
-def register(data: UserCreate, db: Session = Depends(get_db)):
-    if db.query(User).filter(User.email == data.email).first():
+async def register(data: UserCreate, db: AsyncSession = Depends(get_db)):
+    if await db.scalar(select(User).where(User.email == data.email)):
         raise HTTPException(status_code=400, detail="Email already registered")
-    user = User(
-        email=data.email,
-        hashed_password=hash_password(data.password),
-    )
+    try:
+        hashed = await hash_password_async(data.password)
+    except HashPoolBusy as e:
+        raise _busy(e)
+    user = User(email=data.email, hashed_password=hashed)
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
     return Token(access_token=get_token_for_user(str(user.id)))
 
 
 @router.post("/login", response_model=Token)
-def login(data: UserLogin, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == data.email).first()
-    if not user or not verify_password(data.password, user.hashed_password):
+async def login(data: UserLogin, db: AsyncSession = Depends(get_db)):
+    user = await db.scalar(select(User).where(User.email == data.email))
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid email or password")
+    try:
+        ok, new_hash = await verify_and_update_async(data.password, user.hashed_password)
+    except HashPoolBusy as e:
+        raise _busy(e)
+    if not ok:
         raise HTTPException(status_code=401, detail="Invalid email or password")
+    if new_hash:
+        # Stored with an old bcrypt cost; upgrade it now that we have the plaintext
+        user.hashed_password = new_hash
+        await db.commit()
     return Token(access_token=get_token_for_user(str(user.id)))
+
+
+@router.post("/logout", status_code=204)
+async def logout(token: str = Depends(bearer_token), db: AsyncSession = Depends(get_db)):
+    """Revoke the caller's token until it expires, in every process."""
+    payload = await verify_token(token)
+    await revoke_token(db, token_cache, token, payload.get("exp"))
+
+
+@router.get("/token-cache", dependencies=[Depends(get_current_user_id)])
+async def token_cache_stats():
+    return token_cache.stats()
+
+
+@router.get("/hash-pool", dependencies=[Depends(get_current_user_id)])
+async def hash_pool():
+    return hash_pool_stats()
@@ -1,94 +1,154 @@
-"""POST /pdfs/upload, GET /pdfs/, DELETE /pdfs/{pdf_id}."""
+"""POST /pdfs/upload, GET /pdfs/jobs/{job_id}, POST /pdfs/{pdf_id}/events-token, GET /pdfs/{pdf_id}/events,
+POST /pdfs/{pdf_id}/resume, GET /pdfs/, DELETE /pdfs/{pdf_id}."""
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, Header
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.database import get_db
-from app.models import PDF, Question
-from app.schemas.pdf import PDFOut
-from app.utils.jwt import decode_token
-from app.services.pdf_parser import extract_text_from_pdf, chunk_text, save_upload_file
-from app.services.groq import generate_questions_for_chunks
+from app.models import PDF, IngestJob
+from app.schemas.pdf import PDFOut, IngestJobOut, ResumeOut, StreamTokenOut
+from app.dependencies import get_current_user_id, get_stream_user_id
+from app.services.auth import get_stream_token
+from app.services.pdf_parser import save_upload_stream, UploadTooLarge
+from app.services.events import event_stream
+from app.services.generation import resume_failed
+from app.services.ingest import enqueue
+from app.services.revisions import bump_pdfs_revision, get_markers
+from app.utils.etag import conditional_response, make_etag
 
 router = APIRouter()
 
 
-def _get_user_id(authorization: str | None = None) -> UUID:
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Not authenticated")
-    payload = decode_token(authorization.split()[1])
-    if not payload or "sub" not in payload:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    return UUID(payload["sub"])
-
-
-@router.post("/upload", response_model=PDFOut)
+@router.post("/upload", response_model=IngestJobOut, status_code=202)
 async def upload_pdf(
     file: UploadFile,
-    authorization: str | None = Header(None),
-    db: Session = Depends(get_db),
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
 ):
-    user_id = _get_user_id(authorization)
+    """Store the file and queue extraction + question generation; poll GET /pdfs/jobs/{id}.
+
+    Identical bytes already ingested by anyone are not re-processed: the job copies their questions.
+    """
     if not file.filename or not file.filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="PDF file required")
-    contents = await file.read()
-    path = save_upload_file(contents, file.filename)
     try:
-        text = extract_text_from_pdf(path)
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to parse PDF: {e}")
-    chunks = chunk_text(text)
-    print(f"[DEBUG] chunks: {len(chunks)}, first 200 chars: {chunks[0][:200] if chunks else 'EMPTY'}")
-    if not chunks:
-        raise HTTPException(status_code=400, detail="No text extracted from PDF")
-    try:
-        raw_questions = await generate_questions_for_chunks(chunks)
-        print(f"[DEBUG] questions generated: {len(raw_questions)}")
-        if raw_questions:
-            print(f"[DEBUG] first question: {raw_questions[0]}")
-    except Exception as e:
-        print(f"[ERROR] Groq failed: {e}")
-        raw_questions = []
-    pdf_row = PDF(user_id=user_id, filename=file.filename, chunk_count=len(chunks))
+        path, content_hash, _ = await save_upload_stream(file, file.filename)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    pdf_row = PDF(
+        user_id=user_id,
+        filename=file.filename,
+        chunk_count=0,
+        content_hash=content_hash,
+    )
     db.add(pdf_row)
-    db.commit()
-    db.refresh(pdf_row)
-    for q in raw_questions:
-        opt = q.get("options") or {}
-        if isinstance(opt, list):
-            opt = {k: v for k, v in enumerate(opt)}
-        db.add(Question(
-            pdf_id=pdf_row.id,
-            question=q.get("question", ""),
-            options=opt,
-            answer=str(q.get("answer", "A"))[0].upper(),
-            explanation=q.get("explanation", ""),
-            difficulty=(q.get("difficulty") or "medium").lower()[:20],
-        ))
-    db.commit()
-    print(f"[DEBUG] saved {len(raw_questions)} questions to DB for pdf {pdf_row.id}")
-    return pdf_row
+    await db.flush()
+    job = IngestJob(
+        user_id=user_id,
+        pdf_id=pdf_row.id,
+        filename=file.filename,
+        file_path=path,
+        stage="queued",
+        chunks_total=0,
+        chunks_done=0,
+        questions_saved=0,
+    )
+    db.add(job)
+    await bump_pdfs_revision(db, user_id)
+    await db.commit()
+    enqueue(job.id)
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=IngestJobOut)
+async def get_job(
+    job_id: UUID,
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    job = await db.scalar(select(IngestJob).where(IngestJob.id == job_id, IngestJob.user_id == user_id))
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.post("/{pdf_id}/events-token", response_model=StreamTokenOut)
+async def pdf_events_token(
+    pdf_id: UUID,
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    """Token for GET /pdfs/{pdf_id}/events?token=, which cannot send an Authorization header."""
+    if not await db.scalar(select(PDF.id).where(PDF.id == pdf_id, PDF.user_id == user_id)):
+        raise HTTPException(status_code=404, detail="PDF not found")
+    return StreamTokenOut(token=get_stream_token(user_id, pdf_id), expires_in=settings.stream_token_expire_seconds)
+
+
+@router.get("/{pdf_id}/events")
+async def pdf_events(
+    pdf_id: UUID,
+    request: Request,
+    user_id: UUID = Depends(get_stream_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    """Server-sent events: `progress` for the ingestion job and `questions` (no answers) as each chunk is saved."""
+    if not await db.scalar(select(PDF.id).where(PDF.id == pdf_id, PDF.user_id == user_id)):
+        raise HTTPException(status_code=404, detail="PDF not found")
+    await db.close()  # the stream can stay open for minutes; don't hold a pooled connection
+    return StreamingResponse(
+        event_stream(pdf_id, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/{pdf_id}/resume", response_model=ResumeOut)
+async def resume_pdf(
+    pdf_id: UUID,
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    """Retry question generation for the chunks whose last run failed; finished chunks are not touched."""
+    if not await db.scalar(select(PDF.id).where(PDF.id == pdf_id, PDF.user_id == user_id)):
+        raise HTTPException(status_code=404, detail="PDF not found")
+    retried, recovered, generated, still_failed = await resume_failed(db, pdf_id)
+    return ResumeOut(
+        pdf_id=pdf_id,
+        chunks_retried=retried,
+        chunks_recovered=recovered,
+        questions_generated=generated,
+        chunks_failed=still_failed,
+    )
 
 
 @router.delete("/{pdf_id}", status_code=204)
-def delete_pdf(
+async def delete_pdf(
     pdf_id: UUID,
-    authorization: str | None = Header(None),
-    db: Session = Depends(get_db),
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
 ):
-    user_id = _get_user_id(authorization)
-    pdf = db.query(PDF).filter(PDF.id == pdf_id, PDF.user_id == user_id).first()
-    if not pdf:
+    # Questions and attempts go with it via ON DELETE CASCADE
+    result = await db.execute(delete(PDF).where(PDF.id == pdf_id, PDF.user_id == user_id))
+    if not result.rowcount:
         raise HTTPException(status_code=404, detail="PDF not found")
-    db.delete(pdf)
-    db.commit()
+    await bump_pdfs_revision(db, user_id)
+    await db.commit()
 
 
 @router.get("/", response_model=list[PDFOut])
-def list_pdfs(
-    authorization: str | None = Header(None),
-    db: Session = Depends(get_db),
+async def list_pdfs(
+    request: Request,
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
 ):
-    user_id = _get_user_id(authorization)
-    pdfs = db.query(PDF).filter(PDF.user_id == user_id).order_by(PDF.uploaded_at.desc()).all()
-    return pdfs
\ No newline at end of file
+    pdfs_revision, _, _ = await get_markers(db, user_id)
+
+    async def build():
+        pdfs = await db.scalars(select(PDF).where(PDF.user_id == user_id).order_by(PDF.uploaded_at.desc()))
+        return [PDFOut.model_validate(p) for p in pdfs]
+
+    etag = make_etag("pdfs", user_id, pdfs_revision)
+    return await conditional_response(request, f"{user_id}:{request.url.path}", etag, build)
\ No newline at end of file
@@ -1,71 +1,145 @@
-"""POST /quiz/generate, GET /quiz/{pdf_id}, POST /quiz/submit."""
+"""POST /quiz/generate, GET /quiz/review, GET /quiz/{pdf_id}, POST /quiz/submit, POST /quiz/submit-batch."""
+import time
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, Header, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.database import get_db
-from app.models import Question
-from app.schemas.quiz import QuestionOutNoAnswer, QuizSubmit, QuizSubmitResponse
-from app.utils.jwt import decode_token
-from app.services.quiz import get_questions_for_quiz, record_attempt
+from app.models import PDF
+from app.schemas.quiz import (
+    QuestionOutNoAnswer, QuizSubmit, QuizSubmitResponse,
+    QuizSubmitBatch, QuizAnswerResult, QuizSubmitBatchResponse, QuizGenerateResponse,
+    ReviewQuestionOut, ReviewPage,
+)
+from app.dependencies import get_current_user_id
+from app.services.generation import generate_more
+from app.services.quiz import (
+    get_questions_for_quiz, get_review_page, record_attempt, record_attempts, sample_pivot,
+)
+from app.services.revisions import get_markers
+from app.utils.etag import conditional_response, make_etag
 
 router = APIRouter()
 
 
-def _get_user_id(authorization: str | None = None) -> UUID:
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Not authenticated")
-    payload = decode_token(authorization.split()[1])
-    if not payload or "sub" not in payload:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    return UUID(payload["sub"])
-
-
-@router.post("/generate")
+@router.post("/generate", response_model=QuizGenerateResponse)
 async def generate_quiz(
     pdf_id: UUID = Query(...),
     count: int = Query(10, ge=1, le=50),
-    authorization: str | None = Header(None),
-    db: Session = Depends(get_db),
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    """Make sure at least `count` questions the user has not answered exist, generating from unused chunks."""
+    if not await db.scalar(select(PDF.id).where(PDF.id == pdf_id, PDF.user_id == user_id)):
+        raise HTTPException(status_code=404, detail="PDF not found")
+    generated, available, remaining = await generate_more(db, pdf_id, user_id, count)
+    return QuizGenerateResponse(
+        pdf_id=pdf_id, generated=generated, available=available, chunks_remaining=remaining
+    )
+
+
+# Declared before /{pdf_id} so "review" is not parsed as a PDF id
+@router.get("/review", response_model=ReviewPage)
+async def review_quiz(
+    pdf_ids: list[UUID] | None = Query(None),
+    limit: int = Query(20, ge=1, le=50),
+    cursor: str | None = Query(None),
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
 ):
-    """Generate questions for a PDF (questions already created on upload; this can return existing or trigger re-gen)."""
-    _get_user_id(authorization)
-    # For MVP we generate on upload; this endpoint can return existing questions count
-    return {"message": "Questions are generated on PDF upload.", "pdf_id": str(pdf_id)}
+    """Review across PDFs (all of the user's by default): due reviews, then new questions in random order."""
+    try:
+        questions, next_cursor = await get_review_page(db, user_id, pdf_ids, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ReviewPage(
+        questions=[
+            ReviewQuestionOut(
+                id=q.id,
+                pdf_id=q.pdf_id,
+                question=q.question,
+                options=q.options,
+                difficulty=q.difficulty,
+            )
+            for q in questions
+        ],
+        next_cursor=next_cursor,
+    )
 
 
 @router.get("/{pdf_id}", response_model=list[QuestionOutNoAnswer])
-def get_quiz(
+async def get_quiz(
     pdf_id: UUID,
+    request: Request,
     limit: int = Query(10, ge=1, le=50),
-    authorization: str | None = Header(None),
-    db: Session = Depends(get_db),
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
 ):
-    user_id = _get_user_id(authorization)
-    questions = get_questions_for_quiz(db, pdf_id, user_id, limit=limit)
-    return [
-        QuestionOutNoAnswer(
-            id=q.id,
-            question=q.question,
-            options=q.options,
-            difficulty=q.difficulty,
-        )
-        for q in questions
-    ]
+    _, attempts_revision, pdf_revision = await get_markers(db, user_id, pdf_id)
+    # Reviews fall due as time passes with no write, so the tag also rolls over every bucket
+    bucket = int(time.time()) // max(1, settings.quiz_etag_bucket_seconds)
+    # New questions are sampled from a per-user pivot that moves with the ETag, so the cached body stays valid
+    pivot = sample_pivot(user_id, pdf_id, attempts_revision, pdf_revision, bucket)
+
+    async def build():
+        questions = await get_questions_for_quiz(db, pdf_id, user_id, limit=limit, pivot=pivot)
+        return [
+            QuestionOutNoAnswer(
+                id=q.id,
+                question=q.question,
+                options=q.options,
+                difficulty=q.difficulty,
+            )
+            for q in questions
+        ]
+
+    etag = make_etag("quiz", user_id, pdf_id, limit, attempts_revision, pdf_revision, bucket)
+    return await conditional_response(request, f"{user_id}:{request.url.path}?{limit}", etag, build)
 
 
 @router.post("/submit", response_model=QuizSubmitResponse)
-def submit_answer(
+async def submit_answer(
     body: QuizSubmit,
-    authorization: str | None = Header(None),
-    db: Session = Depends(get_db),
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
 ):
-    user_id = _get_user_id(authorization)
-    is_correct, correct_answer, explanation = record_attempt(
-        db, user_id, body.question_id, body.selected
-    )
+    try:
+        is_correct, correct_answer, explanation = await record_attempt(
+            db, user_id, body.question_id, body.selected
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     return QuizSubmitResponse(
         is_correct=is_correct,
         correct_answer=correct_answer,
         explanation=explanation,
     )
+
+
+@router.post("/submit-batch", response_model=QuizSubmitBatchResponse)
+async def submit_batch(
+    body: QuizSubmitBatch,
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    """Grade and record a whole quiz in one round-trip."""
+    try:
+        graded = await record_attempts(db, user_id, [(a.question_id, a.selected) for a in body.answers])
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    results = [
+        QuizAnswerResult(
+            question_id=a.question_id,
+            is_correct=is_correct,
+            correct_answer=correct_answer,
+            explanation=explanation,
+        )
+        for a, (is_correct, correct_answer, explanation) in zip(body.answers, graded)
+    ]
+    return QuizSubmitBatchResponse(
+        results=results,
+        correct_count=sum(r.is_correct for r in results),
+        total=len(results),
+    )
@@ -1,66 +1,40 @@
-"""GET /stats/{pdf_id}."""
+"""GET /stats/, GET /stats/{pdf_id}."""
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, Header
-from sqlalchemy.orm import Session
-from sqlalchemy import func, Integer
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
-from app.models import Attempt, Question
-from app.schemas.stats import StatsOut
-from app.utils.jwt import decode_token
+from app.schemas.stats import StatsOut, StatsOverview
+from app.dependencies import get_current_user_id
+from app.services.revisions import get_markers
+from app.services.stats import get_pdf_stats, get_overview
+from app.utils.etag import conditional_response, make_etag
 
 router = APIRouter()
 
 
-def _get_user_id(authorization: str | None = None) -> UUID:
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Not authenticated")
-    payload = decode_token(authorization.split()[1])
-    if not payload or "sub" not in payload:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    return UUID(payload["sub"])
+@router.get("/", response_model=StatsOverview)
+async def get_stats_overview(
+    request: Request,
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    pdfs_revision, attempts_revision, _ = await get_markers(db, user_id)
+    etag = make_etag("stats", user_id, pdfs_revision, attempts_revision)
+    return await conditional_response(
+        request, f"{user_id}:{request.url.path}", etag, lambda: get_overview(db, user_id)
+    )
 
 
 @router.get("/{pdf_id}", response_model=StatsOut)
-def get_stats(
+async def get_stats(
     pdf_id: UUID,
-    authorization: str | None = Header(None),
-    db: Session = Depends(get_db),
+    request: Request,
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
 ):
-    user_id = _get_user_id(authorization)
-    qids = db.query(Question.id).filter(Question.pdf_id == pdf_id).subquery()
-    attempts = (
-        db.query(
-            func.count(Attempt.id).label("total"),
-            func.sum(func.cast(Attempt.is_correct, Integer)).label("correct"),
-        )
-        .filter(Attempt.user_id == user_id, Attempt.question_id.in_(qids))
-        .first()
-    )
-    total = attempts.total or 0
-    correct = attempts.correct or 0
-    accuracy = (correct / total * 100) if total else 0.0
-    by_diff = (
-        db.query(
-            Question.difficulty,
-            func.count(Attempt.id),
-            func.sum(func.cast(Attempt.is_correct, Integer)),
-        )
-        .join(Attempt, Attempt.question_id == Question.id)
-        .filter(Question.pdf_id == pdf_id, Attempt.user_id == user_id)
-        .group_by(Question.difficulty)
-        .all()
+    _, attempts_revision, pdf_revision = await get_markers(db, user_id, pdf_id)
+    etag = make_etag("stats", user_id, pdf_id, attempts_revision, pdf_revision)
+    return await conditional_response(
+        request, f"{user_id}:{request.url.path}", etag, lambda: get_pdf_stats(db, user_id, pdf_id)
     )
-    by_difficulty = {}
-    for diff, t, c in by_diff:
-        by_difficulty[diff] = {
-            "total": t,
-            "correct": c or 0,
-            "accuracy": (c / t * 100) if t else 0,
-        }
-    return StatsOut(
-        total_attempts=total,
-        correct_count=correct,
-        accuracy_percent=round(accuracy, 1),
-        by_difficulty=by_difficulty,
-    )
\ No newline at end of file
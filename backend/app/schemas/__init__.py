@@ -1,11 +1,15 @@
 from app.schemas.user import UserCreate, UserLogin, Token
-from app.schemas.pdf import PDFCreate, PDFOut
-from app.schemas.quiz import QuestionOut, QuestionOutNoAnswer, QuizSubmit, QuizSubmitResponse
-from app.schemas.stats import StatsOut
+from app.schemas.pdf import PDFCreate, PDFOut, IngestJobOut
+from app.schemas.quiz import (
+    QuestionOut, QuestionOutNoAnswer, QuizSubmit, QuizSubmitResponse,
+    QuizSubmitBatch, QuizAnswerResult, QuizSubmitBatchResponse, QuizGenerateResponse,
+)
+from app.schemas.stats import StatsOut, PDFStatsOut, StatsOverview
 
 __all__ = [
     "UserCreate", "UserLogin", "Token",
-    "PDFCreate", "PDFOut",
+    "PDFCreate", "PDFOut", "IngestJobOut",
     "QuestionOut", "QuizSubmit", "QuizSubmitResponse",
-    "StatsOut",
+    "QuizSubmitBatch", "QuizAnswerResult", "QuizSubmitBatchResponse", "QuizGenerateResponse",
+    "StatsOut", "PDFStatsOut", "StatsOverview",
 ]
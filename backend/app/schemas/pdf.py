@@ -2,6 +2,7 @@
 from datetime import datetime
 from uuid import UUID
 from pydantic import BaseModel
+from typing import Optional
 
 
 class PDFCreate(BaseModel):
@@ -16,3 +17,31 @@ class PDFOut(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class IngestJobOut(BaseModel):
+    id: UUID
+    pdf_id: Optional[UUID] = None
+    filename: str
+    stage: str
+    chunks_total: int
+    chunks_done: int
+    chunks_failed: int = 0
+    questions_saved: int
+    error: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class StreamTokenOut(BaseModel):
+    token: str
+    expires_in: int  # seconds; the stream must be opened before then
+
+
+class ResumeOut(BaseModel):
+    pdf_id: UUID
+    chunks_retried: int
+    chunks_recovered: int
+    questions_generated: int
+    chunks_failed: int  # still failing; call resume again later
@@ -1,7 +1,7 @@
 """Pydantic schemas for questions/answers."""
 from uuid import UUID
-from pydantic import BaseModel
-from typing import Dict
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
 
 
 class QuestionOut(BaseModel):
@@ -27,6 +27,15 @@ class QuestionOutNoAnswer(BaseModel):
         from_attributes = True
 
 
+class ReviewQuestionOut(QuestionOutNoAnswer):
+    pdf_id: UUID
+
+
+class ReviewPage(BaseModel):
+    questions: List[ReviewQuestionOut]
+    next_cursor: Optional[str] = None  # pass back as ?cursor= for the next page; null at the end
+
+
 class QuizSubmit(BaseModel):
     question_id: UUID
     selected: str
@@ -36,3 +45,27 @@ class QuizSubmitResponse(BaseModel):
     is_correct: bool
     correct_answer: str
     explanation: str
+
+
+class QuizSubmitBatch(BaseModel):
+    answers: List[QuizSubmit] = Field(..., min_length=1, max_length=100)
+
+
+class QuizAnswerResult(BaseModel):
+    question_id: UUID
+    is_correct: bool
+    correct_answer: str
+    explanation: str
+
+
+class QuizSubmitBatchResponse(BaseModel):
+    results: List[QuizAnswerResult]
+    correct_count: int
+    total: int
+
+
+class QuizGenerateResponse(BaseModel):
+    pdf_id: UUID
+    generated: int  # questions added by this call
+    available: int  # questions in the PDF the user has not answered yet
+    chunks_remaining: int  # chunks not yet turned into questions
@@ -1,6 +1,7 @@
 """Pydantic schemas for score stats."""
+from uuid import UUID
 from pydantic import BaseModel
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 
 class StatsOut(BaseModel):
@@ -8,3 +9,13 @@ class StatsOut(BaseModel):
     correct_count: int
     accuracy_percent: float
     by_difficulty: Optional[Dict[str, Any]] = None
+
+
+class PDFStatsOut(StatsOut):
+    pdf_id: UUID
+    filename: str
+
+
+class StatsOverview(BaseModel):
+    overall: StatsOut
+    pdfs: List[PDFStatsOut]
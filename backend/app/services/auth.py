@@ -1,8 +1,26 @@
 """Password hashing, token creation."""
+import asyncio
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from uuid import UUID
+
 from passlib.context import CryptContext
+from app.config import settings
 from app.utils.jwt import create_access_token
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+STREAM_SCOPE = "pdf-events"
+
+# min == max == default: any stored hash with a different cost is flagged for rehash on login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.bcrypt_rounds,
+    bcrypt__min_rounds=settings.bcrypt_rounds,
+    bcrypt__max_rounds=settings.bcrypt_rounds,
+)
 
 
 def hash_password(password: str) -> str:
@@ -11,5 +29,84 @@ def hash_password(password: str) -> str:
 def verify_password(plain: str, hashed: str) -> bool:
     return pwd_context.verify(plain[:72], hashed)
 
+def verify_and_update(plain: str, hashed: str) -> tuple[bool, str | None]:
+    """Verify, and return a new hash when the stored one was made with a different cost."""
+    return pwd_context.verify_and_update(plain[:72], hashed)
+
 def get_token_for_user(user_id: str) -> str:
     return create_access_token(data={"sub": str(user_id)})
+
+def get_stream_token(user_id: UUID, pdf_id: UUID) -> str:
+    """Short-lived token that only opens GET /pdfs/{pdf_id}/events, safe to put in a URL."""
+    return create_access_token(
+        data={"sub": str(user_id), "scope": STREAM_SCOPE, "pdf": str(pdf_id)},
+        expires_delta=timedelta(seconds=settings.stream_token_expire_seconds),
+    )
+
+
+class HashPoolBusy(Exception):
+    pass
+
+
+_hash_pool: ProcessPoolExecutor | None = None
+_pending = 0
+_rejected = 0
+_latencies: deque[float] = deque(maxlen=1024)
+
+
+def _get_hash_pool() -> ProcessPoolExecutor:
+    global _hash_pool
+    if _hash_pool is None:
+        # Own processes, not the Starlette threadpool: a login burst only queues behind other logins
+        _hash_pool = ProcessPoolExecutor(
+            max_workers=settings.bcrypt_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _hash_pool
+
+
+def shutdown_hash_pool() -> None:
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown(wait=False, cancel_futures=True)
+        _hash_pool = None
+
+
+async def _run_in_hash_pool(fn, *args):
+    global _pending, _rejected
+    # Shed load instead of letting the queue (and every caller's latency) grow without bound
+    if _pending >= settings.bcrypt_max_pending:
+        _rejected += 1
+        raise HashPoolBusy("Too many concurrent sign-ins, retry shortly")
+    _pending += 1
+    start = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_hash_pool(), fn, *args)
+    finally:
+        _pending -= 1
+        _latencies.append(time.perf_counter() - start)
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_in_hash_pool(hash_password, password)
+
+
+async def verify_and_update_async(plain: str, hashed: str) -> tuple[bool, str | None]:
+    return await _run_in_hash_pool(verify_and_update, plain, hashed)
+
+
+def hash_pool_stats() -> dict[str, float]:
+    samples = sorted(_latencies)
+
+    def pct(p: float) -> float:
+        return round(samples[min(len(samples) - 1, int(p * len(samples)))] * 1000, 1) if samples else 0.0
+
+    return {
+        "workers": settings.bcrypt_workers,
+        "rounds": settings.bcrypt_rounds,
+        "pending": _pending,
+        "rejected": _rejected,
+        "samples": len(samples),
+        "p50_ms": pct(0.50),
+        "p99_ms": pct(0.99),
+    }
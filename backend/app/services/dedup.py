@@ -0,0 +1,101 @@
+"""Near-duplicate question filter: word-shingle MinHash signatures computed in batch with NumPy."""
+import re
+import zlib
+from typing import Any, Iterable
+
+import numpy as np
+
+from app.config import settings
+from app.metrics import QUESTIONS_DROPPED
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_WORD = re.compile(r"\w+")
+# Rows of the (new x existing x num_perm) comparison held in memory at once
+_COMPARE_BLOCK = 512
+
+
+def question_text(q: dict[str, Any]) -> str:
+    """Stem plus option texts: two questions about the same fact differ mostly in wording."""
+    opts = q.get("options") or {}
+    values = opts.values() if isinstance(opts, dict) else opts
+    return " ".join([str(q.get("question", "")), *(str(v) for v in values)])
+
+
+def _shingle_hashes(text: str, k: int) -> np.ndarray:
+    words = _WORD.findall(text.lower())
+    if len(words) < k:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+    return np.fromiter((zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles))
+
+
+class MinHasher:
+    def __init__(self, num_perm: int, shingle_size: int, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self._a = rng.integers(1, _MAX_HASH, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _MAX_HASH, size=num_perm, dtype=np.uint64)
+
+    def signatures(self, texts: Iterable[str]) -> np.ndarray:
+        """One (len(texts), num_perm) matrix for the whole batch: a single broadcast and a segmented min."""
+        per_text = [_shingle_hashes(t, self.shingle_size) for t in texts]
+        if not per_text:
+            return np.empty((0, self.num_perm), dtype=np.uint64)
+        shingles = np.concatenate(per_text)
+        offsets = np.cumsum([0] + [len(h) for h in per_text[:-1]])
+        hashed = ((np.outer(shingles, self._a) + self._b) % _MERSENNE_PRIME) & _MAX_HASH
+        return np.minimum.reduceat(hashed, offsets, axis=0)
+
+
+def _max_similarity(sigs: np.ndarray, against: np.ndarray) -> np.ndarray:
+    """Best estimated Jaccard similarity of each row of `sigs` to any row of `against`."""
+    best = np.zeros(len(sigs))
+    for start in range(0, len(against), _COMPARE_BLOCK):
+        block = against[start:start + _COMPARE_BLOCK]
+        sim = (sigs[:, None, :] == block[None, :, :]).mean(axis=2)
+        best = np.maximum(best, sim.max(axis=1))
+    return best
+
+
+class NearDuplicateFilter:
+    """Remembers every question it has let through (plus any seed) and drops new ones too similar to them."""
+
+    def __init__(self, threshold: float, hasher: MinHasher, seed_texts: Iterable[str] = ()):
+        self.threshold = threshold
+        self.hasher = hasher
+        self.dropped = 0
+        self._sigs = hasher.signatures(list(seed_texts))
+
+    def filter(self, questions: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        if not questions:
+            return []
+        sigs = self.hasher.signatures([question_text(q) for q in questions])
+        keep = np.ones(len(questions), dtype=bool)
+        if len(self._sigs):
+            keep &= _max_similarity(sigs, self._sigs) < self.threshold
+        # Within the batch, the first of each similar group wins
+        pairwise = (sigs[:, None, :] == sigs[None, :, :]).mean(axis=2) >= self.threshold
+        for i in range(len(questions)):
+            if keep[i]:
+                keep[i + 1:] &= ~pairwise[i, i + 1:]
+        self._sigs = np.vstack([self._sigs, sigs[keep]])
+        dropped = int((~keep).sum())
+        self.dropped += dropped
+        QUESTIONS_DROPPED.inc(dropped)
+        return [q for q, k in zip(questions, keep) if k]
+
+
+_hasher: MinHasher | None = None
+
+
+def make_filter(seed_texts: Iterable[str] = ()) -> NearDuplicateFilter | None:
+    """A filter with the configured threshold, or None when dedup is disabled."""
+    global _hasher
+    if not settings.dedup_enabled:
+        return None
+    if _hasher is None:
+        _hasher = MinHasher(settings.dedup_num_perm, settings.dedup_shingle_size)
+    return NearDuplicateFilter(settings.dedup_threshold, _hasher, seed_texts)
@@ -0,0 +1,104 @@
+"""Per-PDF event broker behind GET /pdfs/{pdf_id}/events (server-sent events).
+
+Events are fanned out in-process: a subscriber sees what the worker process it is connected to
+publishes. Progress is also re-read from the database on every keepalive, so a job running in
+another process still shows up, just at keepalive granularity.
+"""
+import asyncio
+import json
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable
+from uuid import UUID
+
+from sqlalchemy import select
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models import IngestJob
+
+SUBSCRIBER_QUEUE_SIZE = 256
+TERMINAL_STAGES = ("done", "failed")
+
+_subscribers: dict[UUID, set[asyncio.Queue]] = defaultdict(set)
+
+
+def publish(pdf_id: UUID, event: str, data: dict[str, Any]) -> None:
+    for queue in _subscribers.get(pdf_id, ()):
+        if queue.full():
+            # A stalled client loses its oldest event rather than holding up the pipeline
+            queue.get_nowait()
+        queue.put_nowait((event, data))
+
+
+def publish_questions(pdf_id: UUID, rows: list[dict[str, Any]]) -> None:
+    """Stored question rows, without answers or explanations."""
+    if rows:
+        publish(pdf_id, "questions", {"questions": [
+            dict(id=r["id"], question=r["question"], options=r["options"], difficulty=r["difficulty"])
+            for r in rows
+        ]})
+
+
+def job_progress(job: IngestJob) -> dict[str, Any]:
+    return dict(
+        job_id=job.id,
+        stage=job.stage,
+        chunks_total=job.chunks_total,
+        chunks_done=job.chunks_done,
+        chunks_failed=job.chunks_failed,
+        questions_saved=job.questions_saved,
+        error=job.error,
+    )
+
+
+@asynccontextmanager
+async def subscribe(pdf_id: UUID) -> AsyncIterator[asyncio.Queue]:
+    queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+    _subscribers[pdf_id].add(queue)
+    try:
+        yield queue
+    finally:
+        _subscribers[pdf_id].discard(queue)
+        if not _subscribers[pdf_id]:
+            del _subscribers[pdf_id]
+
+
+def format_sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def _latest_progress(pdf_id: UUID) -> dict[str, Any] | None:
+    async with AsyncSessionLocal() as db:
+        job = await db.scalar(
+            select(IngestJob).where(IngestJob.pdf_id == pdf_id).order_by(IngestJob.created_at.desc()).limit(1)
+        )
+        return job_progress(job) if job else None
+
+
+async def event_stream(pdf_id: UUID, is_disconnected: Callable[[], Awaitable[bool]]) -> AsyncIterator[str]:
+    """progress / questions events for one PDF until its job finishes or the client goes away."""
+    async with subscribe(pdf_id) as queue:
+        # Subscribed first, so nothing published between the snapshot and the loop is missed
+        last = await _latest_progress(pdf_id)
+        if last:
+            yield format_sse("progress", last)
+            if last["stage"] in TERMINAL_STAGES:
+                return
+        while not await is_disconnected():
+            try:
+                event, data = await asyncio.wait_for(queue.get(), timeout=settings.sse_keepalive_seconds)
+            except asyncio.TimeoutError:
+                current = await _latest_progress(pdf_id)
+                if current and current != last:
+                    last = current
+                    yield format_sse("progress", current)
+                    if current["stage"] in TERMINAL_STAGES:
+                        return
+                yield ": keepalive\n\n"
+                continue
+            yield format_sse(event, data)
+            if event == "progress":
+                last = data
+                if data["stage"] in TERMINAL_STAGES:
+                    return
@@ -0,0 +1,225 @@
+"""On-demand question generation from a PDF's persisted chunks."""
+import uuid
+from datetime import timedelta
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import and_, func, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.metrics import QUESTIONS_SAVED, STAGE_SECONDS
+from app.models import Chunk, IngestJob, Question, ReviewState
+from app.services.dedup import NearDuplicateFilter, make_filter, question_text
+from app.services.events import job_progress, publish, publish_questions
+from app.services.groq import GenerationError, generate_questions_for_chunks
+from app.services.revisions import bump_pdf_revision
+
+QUESTIONS_PER_CHUNK = 4
+
+
+def question_row(pdf_id: UUID, q: dict[str, Any]) -> dict[str, Any]:
+    """Normalize one LLM question dict into Question column values."""
+    opt = q.get("options") or {}
+    if isinstance(opt, list):
+        opt = {k: v for k, v in enumerate(opt)}
+    return dict(
+        id=uuid.uuid4(),
+        pdf_id=pdf_id,
+        question=q.get("question", ""),
+        options=opt,
+        answer=str(q.get("answer", "A"))[0].upper(),
+        explanation=q.get("explanation", ""),
+        difficulty=(q.get("difficulty") or "medium").lower()[:20],
+    )
+
+
+async def store_questions(
+    db: AsyncSession, pdf_id: UUID, chunk_id: UUID, questions: list[dict[str, Any]]
+) -> list[dict[str, Any]]:
+    """Insert one chunk's questions and mark the chunk used; caller commits. Returns the inserted rows."""
+    rows = [question_row(pdf_id, q) for q in questions]
+    if rows:
+        with STAGE_SECONDS.labels("db_insert").time():
+            await db.execute(insert(Question), rows)
+        await bump_pdf_revision(db, pdf_id)
+        QUESTIONS_SAVED.inc(len(rows))
+    await db.execute(
+        update(Chunk)
+        .where(Chunk.id == chunk_id)
+        .values(status="done", questions_count=len(rows), last_error=None, claimed_at=None)
+    )
+    return rows
+
+
+async def fail_chunk(db: AsyncSession, chunk_id: UUID, error: GenerationError) -> None:
+    """Record a chunk whose generation ran out of retries; POST /pdfs/{id}/resume picks it up again. Caller commits."""
+    await db.execute(
+        update(Chunk)
+        .where(Chunk.id == chunk_id)
+        .values(status="failed", last_error=str(error)[:2000], claimed_at=None)
+    )
+
+
+async def seeded_filter(pdf_id: UUID) -> NearDuplicateFilter | None:
+    async with AsyncSessionLocal() as db:
+        existing = await db.execute(select(Question.question, Question.options).where(Question.pdf_id == pdf_id))
+        return make_filter(question_text(dict(question=q, options=o)) for q, o in existing)
+
+
+async def claim_chunks(pdf_id: UUID, limit: int | None, failed: bool = False) -> list[tuple[UUID, str]]:
+    """Take the next unused chunks in document order; concurrent callers skip each other's rows.
+
+    Chunks left 'generating' by a crashed process become claimable again after the claim timeout.
+    failed=True takes only chunks whose last run failed, which on-demand generation leaves alone.
+    """
+    stale = func.now() - timedelta(seconds=settings.chunk_claim_timeout_seconds)
+    if failed:
+        claimable = Chunk.status == "failed"
+    else:
+        claimable = or_(Chunk.status == "pending", and_(Chunk.status == "generating", Chunk.claimed_at < stale))
+    async with AsyncSessionLocal() as db:
+        picked = (
+            select(Chunk.id)
+            .where(Chunk.pdf_id == pdf_id, claimable)
+            .order_by(Chunk.seq)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        rows = (
+            await db.execute(
+                update(Chunk)
+                .where(Chunk.id.in_(picked.scalar_subquery()))
+                .values(status="generating", claimed_at=func.now(), attempts=Chunk.attempts + 1)
+                .returning(Chunk.id, Chunk.seq, Chunk.text)
+            )
+        ).all()
+        await db.commit()
+    return [(chunk_id, text) for chunk_id, _, text in sorted(rows, key=lambda r: r.seq)]
+
+
+async def release_chunks(chunk_ids: list[UUID]) -> None:
+    """Hand chunks whose generation did not finish back to the pool."""
+    if not chunk_ids:
+        return
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(Chunk)
+            .where(Chunk.id.in_(chunk_ids), Chunk.status == "generating")
+            .values(status="pending", claimed_at=None)
+        )
+        await db.commit()
+
+
+async def generate_for_chunks(
+    pdf_id: UUID, chunks: list[tuple[UUID, str]], dedup: NearDuplicateFilter | None
+) -> tuple[int, int]:
+    """Generate and store questions for claimed chunks. Returns (questions saved, chunks failed)."""
+    saved = failed = 0
+
+    async def save(i: int, questions: list[dict[str, Any]]) -> None:
+        nonlocal saved
+        if dedup:
+            questions = dedup.filter(questions)
+        async with AsyncSessionLocal() as db:
+            rows = await store_questions(db, pdf_id, chunks[i][0], questions)
+            await db.commit()
+        publish_questions(pdf_id, rows)
+        saved += len(rows)
+
+    async def fail(i: int, error: GenerationError) -> None:
+        nonlocal failed
+        async with AsyncSessionLocal() as db:
+            await fail_chunk(db, chunks[i][0], error)
+            await db.commit()
+        failed += 1
+
+    try:
+        await generate_questions_for_chunks(
+            [text for _, text in chunks], questions_per_chunk=QUESTIONS_PER_CHUNK, on_chunk=save, on_error=fail
+        )
+    finally:
+        await release_chunks([chunk_id for chunk_id, _ in chunks])
+    return saved, failed
+
+
+async def count_unanswered(db: AsyncSession, pdf_id: UUID, user_id: UUID) -> int:
+    seen = (
+        select(ReviewState.question_id)
+        .where(ReviewState.user_id == user_id, ReviewState.question_id == Question.id)
+        .exists()
+    )
+    return await db.scalar(select(func.count()).select_from(Question).where(Question.pdf_id == pdf_id, ~seen))
+
+
+async def count_unused_chunks(db: AsyncSession, pdf_id: UUID) -> int:
+    return await db.scalar(
+        select(func.count())
+        .select_from(Chunk)
+        .where(Chunk.pdf_id == pdf_id, Chunk.status.in_(("pending", "generating")))
+    )
+
+
+async def count_failed_chunks(db: AsyncSession, pdf_id: UUID) -> int:
+    return await db.scalar(
+        select(func.count()).select_from(Chunk).where(Chunk.pdf_id == pdf_id, Chunk.status == "failed")
+    )
+
+
+async def count_in_flight_chunks(db: AsyncSession, pdf_id: UUID) -> int:
+    """Chunks another request or the ingest job is generating right now (stale claims excluded)."""
+    stale = func.now() - timedelta(seconds=settings.chunk_claim_timeout_seconds)
+    return await db.scalar(
+        select(func.count())
+        .select_from(Chunk)
+        .where(Chunk.pdf_id == pdf_id, Chunk.status == "generating", Chunk.claimed_at >= stale)
+    )
+
+
+async def generate_more(db: AsyncSession, pdf_id: UUID, user_id: UUID, count: int) -> tuple[int, int, int]:
+    """Top the PDF up to `count` questions the user has not answered, using only as many chunks as needed.
+
+    Returns (generated, available, chunks_remaining). Chunks that fail are left for resume_failed.
+    Near-duplicates dropped by the filter are not made up for in the same call, so `available` can
+    land a little under `count`. `db` is closed once the initial counts are read.
+    """
+    available = await count_unanswered(db, pdf_id, user_id)
+    generated = 0
+    # Questions already on their way (e.g. the upload's first chunks, streamed over SSE) count too
+    in_flight = await count_in_flight_chunks(db, pdf_id) * QUESTIONS_PER_CHUNK
+    # LLM calls can take many seconds under the rate limiter; don't hold a pooled connection through them
+    await db.close()
+    missing = count - available - in_flight
+    if missing > 0:
+        chunks = await claim_chunks(pdf_id, -(-missing // QUESTIONS_PER_CHUNK))
+        if chunks:
+            generated, _ = await generate_for_chunks(pdf_id, chunks, await seeded_filter(pdf_id))
+    async with AsyncSessionLocal() as db:
+        remaining = await count_unused_chunks(db, pdf_id)
+    return generated, available + generated, remaining
+
+
+async def resume_failed(db: AsyncSession, pdf_id: UUID) -> tuple[int, int, int, int]:
+    """Re-run generation for the PDF's failed chunks only. Returns (retried, recovered, generated, still_failed).
+
+    `db` is closed before the LLM calls so the request does not hold a pooled connection through them.
+    """
+    await db.close()
+    chunks = await claim_chunks(pdf_id, None, failed=True)
+    generated = failed = 0
+    if chunks:
+        generated, failed = await generate_for_chunks(pdf_id, chunks, await seeded_filter(pdf_id))
+    async with AsyncSessionLocal() as db:
+        still_failed = await count_failed_chunks(db, pdf_id)
+        # Keep the upload's job (what GET /pdfs/jobs/{id} and the event stream report) in step
+        job = await db.scalar(
+            update(IngestJob)
+            .where(IngestJob.pdf_id == pdf_id)
+            .values(chunks_failed=still_failed, questions_saved=IngestJob.questions_saved + generated)
+            .returning(IngestJob)
+        )
+        await db.commit()
+    if job:
+        publish(pdf_id, "progress", job_progress(job))
+    return len(chunks), len(chunks) - failed, generated, still_failed
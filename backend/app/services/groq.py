@@ -2,10 +2,22 @@
 import json
 import re
 import asyncio
+import logging
 import os
-from typing import Any
+import random
+from functools import lru_cache
+from typing import Any, AsyncIterable, Awaitable, Callable, Iterable
 
-from groq import Groq
+import httpx
+from groq import APIConnectionError, APIStatusError, APITimeoutError, AsyncGroq, RateLimitError
+
+from app.config import settings
+from app.metrics import LLM_CACHE, LLM_ERRORS, LLM_RATE_LIMITED, LLM_TOKENS, PARSE_FAILURES, STAGE_SECONDS
+from app.services.llm_cache import llm_cache, make_key
+from app.services.llm_scheduler import scheduler
+from app.services.tokenizer import get_tokenizer
+
+logger = logging.getLogger(__name__)
 
 SYSTEM_PROMPT = """You are an expert tutor and quiz generator. Given content extracted from a PDF, generate high-quality quiz questions.
 
@@ -32,6 +44,17 @@ Respond ONLY in this JSON format, no extra text:
 }
 """
 
+class GenerationError(Exception):
+    """A chunk produced no usable response. retryable=False for errors a retry cannot fix (bad request, no key)."""
+
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+MODEL = "llama-3.1-8b-instant"
+TEMPERATURE = 0.3
+
 
 def _user_message(chunk: str, n: int = 4) -> str:
     return f'''Content:
@@ -42,9 +65,43 @@ def _user_message(chunk: str, n: int = 4) -> str:
 Generate {n} quiz questions from the content above.'''
 
 
+@lru_cache(maxsize=1)
+def _system_prompt_tokens() -> int:
+    return get_tokenizer().count(SYSTEM_PROMPT)
+
+
+def estimate_tokens(chunk: str, n: int = 4) -> int:
+    """Prompt tokens (system + user message) plus the expected completion size."""
+    prompt_tokens = _system_prompt_tokens() + get_tokenizer().count(_user_message(chunk, n))
+    return prompt_tokens + n * settings.llm_output_tokens_per_question
+
+
+def _retry_after(e: RateLimitError) -> float:
+    try:
+        return float(e.response.headers.get("retry-after"))
+    except (TypeError, ValueError, AttributeError):
+        return settings.llm_default_retry_after
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter for transient failures (attempt counts from 0)."""
+    return random.uniform(0, min(settings.llm_retry_max_delay, settings.llm_retry_base_delay * 2 ** attempt))
+
+
+def _is_transient(e: Exception) -> bool:
+    if isinstance(e, (APIConnectionError, APITimeoutError)):
+        return True
+    return isinstance(e, APIStatusError) and (e.status_code >= 500 or e.status_code in (408, 409))
+
 from json_repair import repair_json
 
 def _parse_json(response_text: str) -> list[dict[str, Any]]:
+    """Questions from a model response; raises GenerationError if it holds no usable JSON."""
+    with STAGE_SECONDS.labels("json_parse").time():
+        return _parse_json_text(response_text)
+
+
+def _parse_json_text(response_text: str) -> list[dict[str, Any]]:
     text = response_text.strip()
     if "```json" in text:
         text = text.split("```json")[1].split("```")[0].strip()
@@ -53,55 +110,185 @@ def _parse_json(response_text: str) -> list[dict[str, Any]]:
     start = text.find("{")
     end = text.rfind("}") + 1
     if start == -1 or end == 0:
-        print(f"[ERROR] No JSON object found: {text[:200]}")
-        return []
+        PARSE_FAILURES.inc()
+        logger.error("No JSON object found", extra={"snippet": text[:200]})
+        raise GenerationError("No JSON object in LLM response")
     text = text[start:end]
     try:
         data = json.loads(repair_json(text))
         return data.get("questions", [])
     except Exception as e:
-        print(f"[ERROR] JSON parse failed: {e} | snippet: {text[:200]}")
-        return []
-
-def _generate_sync(chunk: str, n: int = 4) -> list[dict[str, Any]]:
-    api_key = os.getenv("GROQ_API_KEY")
-    if not api_key:
-        return []
-    client = Groq(api_key=api_key)
-    try:
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": _user_message(chunk, n)},
-            ],
-            temperature=0.3,
+        PARSE_FAILURES.inc()
+        logger.error("JSON parse failed: %s", e, extra={"snippet": text[:200]})
+        raise GenerationError(f"Unparseable LLM response: {e}") from e
+
+
+def _usable(q: Any) -> bool:
+    return isinstance(q, dict) and bool(q.get("question")) and bool(q.get("options"))
+
+_client: AsyncGroq | None = None
+_semaphore = asyncio.Semaphore(settings.llm_max_concurrency)
+
+
+def _get_client() -> AsyncGroq | None:
+    """One long-lived client per process so HTTP connections are pooled and kept alive."""
+    global _client
+    if _client is None:
+        api_key = os.getenv("GROQ_API_KEY")
+        if not api_key:
+            return None
+        # Retries are driven by the scheduler, not the SDK, so a 429 pauses every caller
+        _client = AsyncGroq(
+            api_key=api_key,
+            base_url=settings.groq_base_url or None,
+            max_retries=0,
+            timeout=settings.llm_timeout_seconds,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.llm_max_connections,
+                    max_keepalive_connections=settings.llm_max_connections,
+                ),
+                timeout=settings.llm_timeout_seconds,
+            ),
         )
-        text = response.choices[0].message.content
-        if not text:
-            return []
-        return _parse_json(text)
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
+async def _generate(chunk: str, n: int = 4) -> tuple[str, int | None]:
+    """Return (response text, total_tokens used). Rate-limit errors propagate so the caller can back off;
+    anything else is raised as GenerationError."""
+    client = _get_client()
+    if client is None:
+        raise GenerationError("GROQ_API_KEY is not set", retryable=False)
+    try:
+        async with _semaphore, STAGE_SECONDS.labels("llm_call").time():
+            response = await client.chat.completions.create(
+                model=MODEL,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": _user_message(chunk, n)},
+                ],
+                temperature=TEMPERATURE,
+                timeout=settings.llm_timeout_seconds,
+            )
+    except RateLimitError:
+        LLM_RATE_LIMITED.inc()
+        raise
     except Exception as e:
-        print(f"[ERROR] Groq chunk failed: {e}")
-        return []
+        LLM_ERRORS.inc()
+        logger.warning("Groq call failed: %s", e)
+        raise GenerationError(f"{type(e).__name__}: {e}", retryable=_is_transient(e)) from e
+    usage = response.usage.total_tokens if response.usage else None
+    if response.usage:
+        LLM_TOKENS.labels("prompt").inc(response.usage.prompt_tokens)
+        LLM_TOKENS.labels("completion").inc(response.usage.completion_tokens)
+    return response.choices[0].message.content or "", usage
 
 
 async def generate_questions_for_chunk(chunk: str, n: int = 4) -> list[dict[str, Any]]:
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(None, _generate_sync, chunk, n)
+    """Questions for one chunk. 429s wait out retry-after, transient errors and unparseable or empty responses
+    are retried with exponential backoff; raises GenerationError once retries run out or on a permanent error,
+    so a chunk is never marked done without questions.
+    """
+    cache_key = make_key(MODEL, SYSTEM_PROMPT, chunk, n, TEMPERATURE)
+    if llm_cache:
+        cached = await llm_cache.aget(cache_key)
+        LLM_CACHE.labels("miss" if cached is None else "hit").inc()
+        if cached is not None:
+            return cached
+    estimated = estimate_tokens(chunk, n)
+    last_error = "rate limited"
+    for attempt in range(settings.llm_max_retries + 1):
+        charged = await scheduler.acquire(estimated)
+        try:
+            text, used = await _generate(chunk, n)
+            if used is not None:
+                scheduler.settle(charged, used)
+            questions = [q for q in (_parse_json(text) if text else []) if _usable(q)]
+            if not questions:
+                raise GenerationError("No usable questions in LLM response")
+        except RateLimitError as e:
+            retry_after = _retry_after(e)
+            logger.warning("Groq 429, retrying in %.1fs", retry_after, extra={"attempt": attempt + 1})
+            scheduler.backoff(retry_after)
+            last_error = "rate limited"
+            continue
+        except GenerationError as e:
+            if not e.retryable:
+                raise
+            last_error = str(e)
+            if attempt < settings.llm_max_retries:
+                delay = _backoff_delay(attempt)
+                logger.warning("Groq chunk failed, retrying in %.1fs", delay, extra={"attempt": attempt + 1})
+                await asyncio.sleep(delay)
+            continue
+        if llm_cache:
+            await llm_cache.aput(cache_key, questions)
+        return questions
+    raise GenerationError(f"Gave up after {settings.llm_max_retries + 1} attempts: {last_error}")
+
+
+async def generate_questions_for_chunks(
+    chunks: Iterable[str] | AsyncIterable[str],
+    questions_per_chunk: int = 4,
+    on_chunk: Callable[[int, list[dict[str, Any]]], Awaitable[None]] | None = None,
+    max_pending: int | None = None,
+    on_error: Callable[[int, GenerationError], Awaitable[None]] | None = None,
+) -> list[dict[str, Any]]:
+    """Generate questions for all chunks, dispatched as fast as the shared TPM/RPM budget allows.
 
+    chunks may be an async stream; each chunk is scheduled as soon as it arrives, and at most
+    max_pending chunks are held in flight (the stream is not pulled further until one finishes).
+    on_chunk(index, questions) is awaited as each chunk completes, index being the chunk's position in
+    the input; the result keeps chunk order. A chunk whose generation fails is passed to
+    on_error(index, error) and contributes no questions; without on_error the error propagates.
+    """
+    pending = asyncio.Semaphore(max_pending) if max_pending else None
 
-async def generate_questions_for_chunks(chunks: list[str], questions_per_chunk: int = 4) -> list[dict[str, Any]]:
-    all_questions = []
-    batch_size = 2  # 3 chunks at a time to stay under 6000 TPM limit
-    for i in range(0, len(chunks), batch_size):
-        batch = chunks[i:i + batch_size]
-        print(f"[DEBUG] Processing batch {i // batch_size + 1}/{(len(chunks) + batch_size - 1) // batch_size}")
-        tasks = [generate_questions_for_chunk(c, questions_per_chunk) for c in batch]
+    async def run(index: int, chunk: str) -> list[dict[str, Any]]:
+        try:
+            questions = await generate_questions_for_chunk(chunk, questions_per_chunk)
+        except GenerationError as e:
+            if not on_error:
+                raise
+            logger.error("Chunk generation failed: %s", e, extra={"chunk_index": index})
+            await on_error(index, e)
+            return []
+        finally:
+            if pending:
+                pending.release()
+        if on_chunk:
+            await on_chunk(index, questions)
+        return questions
+
+    async def schedule(chunk: str) -> asyncio.Task:
+        if pending:
+            await pending.acquire()
+        return asyncio.create_task(run(len(tasks), chunk))
+
+    tasks = []
+    try:
+        if isinstance(chunks, AsyncIterable):
+            async for chunk in chunks:
+                tasks.append(await schedule(chunk))
+        else:
+            for chunk in chunks:
+                tasks.append(await schedule(chunk))
         results = await asyncio.gather(*tasks)
-        for qlist in results:
-            all_questions.extend(qlist)
-        if i + batch_size < len(chunks):
-            await asyncio.sleep(15)  # wait 15s between batches to reset TPM window
-    print(f"[DEBUG] Total questions generated: {len(all_questions)}")
-    return all_questions
\ No newline at end of file
+    except BaseException:
+        # Stop and wait for the other chunks before the caller sees the error, so none of them stores
+        # questions after the caller has released its chunks
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    all_questions = [q for qlist in results for q in qlist]
+    logger.debug("Total questions generated: %d", len(all_questions))
+    return all_questions
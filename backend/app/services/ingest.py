@@ -0,0 +1,449 @@
+"""Background PDF ingestion: job queue, worker pool, extract -> chunk -> persist -> generate the first questions."""
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import case, delete, func, insert, literal, select, update
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.metrics import STAGE_SECONDS
+from app.models import PDF, Question, IngestJob, Chunk
+from app.services.pdf_parser import aiter_pdf_pages, aiter_chunks
+from app.services.events import job_progress, publish, publish_questions
+from app.services.generation import QUESTIONS_PER_CHUNK, fail_chunk, release_chunks, seeded_filter, store_questions
+from app.services.groq import GenerationError, generate_questions_for_chunks
+from app.services.revisions import bump_pdf_revision, bump_pdfs_revision
+
+logger = logging.getLogger(__name__)
+
+# Chunks beyond the eagerly generated ones are written in batches of this many rows
+CHUNK_INSERT_BATCH = 32
+# Stages a job is left in when the process running it stops mid-way
+INTERRUPTED_STAGES = ("extracting", "generating")
+
+_queue: asyncio.Queue[UUID] = asyncio.Queue()
+_workers: list[asyncio.Task] = []
+
+
+def enqueue(job_id: UUID) -> None:
+    _queue.put_nowait(job_id)
+
+
+async def _claim(job_id: UUID) -> IngestJob | None:
+    """Atomically move a queued job to 'extracting' and take its lease so only one worker runs it."""
+    async with AsyncSessionLocal() as db:
+        job = await db.scalar(
+            update(IngestJob)
+            .where(IngestJob.id == job_id, IngestJob.stage == "queued")
+            .values(stage="extracting", lease_owner=uuid.uuid4(), heartbeat_at=func.now())
+            .returning(IngestJob)
+        )
+        await db.commit()
+        return job
+
+
+def _publish_progress(job: IngestJob | None, pdf_id: UUID | None = None) -> None:
+    pdf_id = pdf_id or (job.pdf_id if job else None)
+    if job and pdf_id:
+        publish(pdf_id, "progress", job_progress(job))
+
+
+async def _update(job_id: UUID, **values) -> None:
+    async with AsyncSessionLocal() as db:
+        job = await db.scalar(
+            update(IngestJob).where(IngestJob.id == job_id).values(**values).returning(IngestJob)
+        )
+        await db.commit()
+    _publish_progress(job)
+
+
+async def _fail(job: IngestJob, error: str) -> None:
+    """Mark the job failed and drop its placeholder PDF and uploaded file so the library stays clean."""
+    async with AsyncSessionLocal() as db:
+        failed = await db.scalar(
+            update(IngestJob)
+            .where(IngestJob.id == job.id)
+            .values(stage="failed", error=error[:2000], pdf_id=None)
+            .returning(IngestJob)
+        )
+        if job.pdf_id:
+            await db.execute(delete(PDF).where(PDF.id == job.pdf_id))
+            await bump_pdfs_revision(db, job.user_id)
+        await db.commit()
+    _publish_progress(failed, job.pdf_id)
+    try:
+        os.remove(job.file_path)
+    except OSError:
+        pass
+
+
+async def _reuse_existing(job: IngestJob) -> bool:
+    """If an identical document was already ingested, copy its chunks and questions instead of re-running the pipeline."""
+    async with AsyncSessionLocal() as db:
+        content_hash = await db.scalar(select(PDF.content_hash).where(PDF.id == job.pdf_id))
+        if not content_hash:
+            return False
+        source = (
+            await db.execute(
+                select(PDF.id, PDF.chunk_count)
+                .join(IngestJob, IngestJob.pdf_id == PDF.id)
+                .where(
+                    PDF.content_hash == content_hash,
+                    PDF.id != job.pdf_id,
+                    IngestJob.stage == "done",
+                    IngestJob.questions_saved > 0,
+                )
+                .order_by(IngestJob.updated_at.desc())
+                .limit(1)
+            )
+        ).first()
+        if not source:
+            return False
+        source_id, chunk_count = source
+        columns = ["question", "options", "answer", "explanation", "difficulty"]
+        copied = (
+            await db.execute(
+                insert(Question).from_select(
+                    ["id", "pdf_id", *columns],
+                    select(
+                        func.gen_random_uuid(),
+                        literal(job.pdf_id, PG_UUID(as_uuid=True)),
+                        *(getattr(Question, c) for c in columns),
+                    ).where(Question.pdf_id == source_id),
+                )
+            )
+        ).rowcount
+        # Chunks the source has not used yet stay available for on-demand generation on the copy
+        await db.execute(
+            insert(Chunk).from_select(
+                ["id", "pdf_id", "seq", "text", "status", "questions_count"],
+                select(
+                    func.gen_random_uuid(),
+                    literal(job.pdf_id, PG_UUID(as_uuid=True)),
+                    Chunk.seq,
+                    Chunk.text,
+                    case((Chunk.status == "done", "done"), else_="pending"),
+                    Chunk.questions_count,
+                ).where(Chunk.pdf_id == source_id),
+            )
+        )
+        await db.execute(update(PDF).where(PDF.id == job.pdf_id).values(chunk_count=chunk_count))
+        done = await db.scalar(
+            update(IngestJob)
+            .where(IngestJob.id == job.id)
+            .values(stage="done", chunks_total=chunk_count, chunks_done=chunk_count, questions_saved=copied)
+            .returning(IngestJob)
+        )
+        await bump_pdf_revision(db, job.pdf_id)
+        await bump_pdfs_revision(db, job.user_id)
+        await db.commit()
+    _publish_progress(done)
+    logger.info(
+        "Reused questions from identical upload",
+        extra={"job_id": job.id, "questions": copied, "source_pdf_id": source_id},
+    )
+    # The bytes are identical to the source upload, so the new copy is never read again
+    try:
+        os.remove(job.file_path)
+    except OSError:
+        pass
+    return True
+
+
+async def _done_chunk_seqs(pdf_id: UUID) -> set[int]:
+    """Chunks a previous, interrupted run already turned into questions."""
+    async with AsyncSessionLocal() as db:
+        return set(await db.scalars(select(Chunk.seq).where(Chunk.pdf_id == pdf_id, Chunk.status == "done")))
+
+
+async def _keep_lease(job: IngestJob, run: asyncio.Task) -> None:
+    """Refresh the job's heartbeat while it runs; cancel the run if another process has taken it over."""
+    while True:
+        await asyncio.sleep(settings.ingest_lease_seconds / 4)
+        try:
+            async with AsyncSessionLocal() as db:
+                held = (
+                    await db.execute(
+                        update(IngestJob)
+                        .where(IngestJob.id == job.id, IngestJob.lease_owner == job.lease_owner)
+                        .values(heartbeat_at=func.now())
+                    )
+                ).rowcount
+                await db.commit()
+        except Exception:
+            # A missed beat is fine; the lease only lapses after several in a row
+            logger.exception("Could not refresh ingest job lease", extra={"job_id": job.id})
+            continue
+        if not held:
+            logger.warning("Ingest job lease lost; stopping this run", extra={"job_id": job.id})
+            run.cancel()
+            return
+
+
+async def run_job(job_id: UUID) -> None:
+    job = await _claim(job_id)
+    if not job:
+        return
+    run = asyncio.create_task(_run(job))
+    lease = asyncio.create_task(_keep_lease(job, run))
+    try:
+        await run
+    except asyncio.CancelledError:
+        # Cancelled by _keep_lease rather than a shutdown: the process that recovered the job owns it now
+        if not asyncio.current_task().cancelling():
+            return
+        raise
+    except Exception as e:
+        logger.exception("Ingest job crashed", extra={"job_id": job.id})
+        await _fail(job, f"Ingest failed: {e}")
+    finally:
+        lease.cancel()
+
+
+async def _run(job: IngestJob) -> None:
+    # A re-run after a crash or shutdown keeps what was finished and re-creates only the rest
+    done_seqs = await _done_chunk_seqs(job.pdf_id)
+    if not done_seqs and await _reuse_existing(job):
+        return
+    # Every chunk is persisted; only the first few are turned into questions now; POST /quiz/generate
+    # draws on the rest when a user actually needs more
+    initial_chunks = -(-settings.ingest_initial_questions // QUESTIONS_PER_CHUNK)
+    # Overlapping chunks yield restatements of the same fact; screen them (and anything already stored) out
+    dedup = await seeded_filter(job.pdf_id)
+    # Pages are parsed in the extraction process pool and chunks are handed over through a small
+    # bounded queue, so generation starts on chunk 1 while later pages are still being parsed and
+    # memory stays at a few chunks per job
+    chunk_queue: asyncio.Queue[str | None] = asyncio.Queue(maxsize=settings.ingest_max_pending_chunks)
+
+    async def produce() -> None:
+        try:
+            async for chunk in aiter_chunks(aiter_pdf_pages(job.file_path)):
+                await chunk_queue.put(chunk)
+        finally:
+            await chunk_queue.put(None)
+
+    chunks_seen = 0
+    exhausted = False
+    eager_ids: list[UUID] = []
+    rows: list[dict[str, Any]] = []
+
+    async def persist() -> None:
+        if not rows:
+            return
+        async with AsyncSessionLocal() as db:
+            with STAGE_SECONDS.labels("db_insert").time():
+                await db.execute(insert(Chunk), rows)
+            await db.commit()
+        rows.clear()
+
+    async def accept(chunk: str) -> bool:
+        """Queue the chunk for insert; True if it should be generated right away."""
+        nonlocal chunks_seen
+        if chunks_seen in done_seqs:
+            chunks_seen += 1
+            return False
+        eager = chunks_seen < initial_chunks
+        chunk_id = uuid.uuid4()
+        rows.append(dict(
+            id=chunk_id,
+            pdf_id=job.pdf_id,
+            seq=chunks_seen,
+            text=chunk.replace("\x00", ""),
+            status="generating" if eager else "pending",
+            questions_count=0,
+            attempts=1 if eager else 0,
+            claimed_at=datetime.now(timezone.utc) if eager else None,
+        ))
+        chunks_seen += 1
+        # Eager chunks must exist before their questions are saved against them
+        if eager or len(rows) >= CHUNK_INSERT_BATCH:
+            await persist()
+        if eager:
+            eager_ids.append(chunk_id)
+        return eager
+
+    async def stream_chunks():
+        nonlocal exhausted
+        while (chunk := await chunk_queue.get()) is not None:
+            if chunks_seen == 0:
+                await _update(job.id, stage="generating")
+            if await accept(chunk):
+                yield chunk
+        exhausted = True
+
+    saved = 0
+
+    async def save_chunk(i: int, questions: list[dict[str, Any]]) -> None:
+        nonlocal saved
+        if dedup:
+            questions = dedup.filter(questions)
+        saved += len(questions)
+        async with AsyncSessionLocal() as db:
+            rows = await store_questions(db, job.pdf_id, eager_ids[i], questions)
+            # Increment in SQL: concurrent chunk commits may land in any order
+            progress = await db.scalar(
+                update(IngestJob)
+                .where(IngestJob.id == job.id)
+                .values(
+                    chunks_total=func.greatest(IngestJob.chunks_total, chunks_seen),
+                    chunks_done=IngestJob.chunks_done + 1,
+                    questions_saved=IngestJob.questions_saved + len(questions),
+                )
+                .returning(IngestJob)
+            )
+            await db.commit()
+        # Only after commit: a client may fetch or answer these right away
+        publish_questions(job.pdf_id, rows)
+        _publish_progress(progress)
+
+    async def fail_chunk_of_job(i: int, error: GenerationError) -> None:
+        # The chunk keeps its text; POST /pdfs/{id}/resume retries just this one
+        async with AsyncSessionLocal() as db:
+            await fail_chunk(db, eager_ids[i], error)
+            progress = await db.scalar(
+                update(IngestJob)
+                .where(IngestJob.id == job.id)
+                .values(
+                    chunks_total=func.greatest(IngestJob.chunks_total, chunks_seen),
+                    chunks_failed=IngestJob.chunks_failed + 1,
+                )
+                .returning(IngestJob)
+            )
+            await db.commit()
+        _publish_progress(progress)
+
+    producer = asyncio.create_task(produce())
+    try:
+        await generate_questions_for_chunks(
+            stream_chunks(),
+            questions_per_chunk=QUESTIONS_PER_CHUNK,
+            on_chunk=save_chunk,
+            max_pending=settings.ingest_max_pending_chunks,
+            on_error=fail_chunk_of_job,
+        )
+    except Exception:
+        logger.exception("Question generation failed", extra={"job_id": job.id})
+        # Its in-flight chunks are already cancelled and awaited, so none can store questions after
+        # release_chunks below hands them back. Keep storing the rest of the document (and unblock the producer)
+        while not exhausted and (chunk := await chunk_queue.get()) is not None:
+            await accept(chunk)
+    try:
+        await producer
+    except Exception as e:
+        await _fail(job, f"Failed to parse PDF: {e}")
+        return
+    await persist()
+    await release_chunks(eager_ids)
+    if not chunks_seen:
+        await _fail(job, "No text extracted from PDF")
+        return
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(PDF).where(PDF.id == job.pdf_id).values(chunk_count=chunks_seen))
+        done = await db.scalar(
+            update(IngestJob)
+            .where(IngestJob.id == job.id)
+            .values(stage="done", chunks_total=chunks_seen)
+            .returning(IngestJob)
+        )
+        await bump_pdfs_revision(db, job.user_id)
+        await db.commit()
+    _publish_progress(done)
+    logger.info(
+        "Ingest job done",
+        extra={
+            "job_id": job.id,
+            "pdf_id": job.pdf_id,
+            "chunks": chunks_seen,
+            "questions": saved,
+            "failed_chunks": done.chunks_failed if done else 0,
+            "dropped_duplicates": dedup.dropped if dedup else 0,
+        },
+    )
+
+
+async def _worker() -> None:
+    while True:
+        job_id = await _queue.get()
+        try:
+            await run_job(job_id)
+        except Exception:
+            # run_job fails the job itself; this is a claim or cleanup error, and the lease covers recovery
+            logger.exception("Ingest job crashed", extra={"job_id": job_id})
+        finally:
+            _queue.task_done()
+
+
+async def _requeue_interrupted() -> list[UUID]:
+    """Put jobs whose process stopped mid-way back in the queue; returns their ids.
+
+    Only jobs whose lease has lapsed are touched, so a job a live process is still running (and
+    heartbeating) is left alone however the processes start and restart. Their chunks that already
+    have questions are kept (run_job skips those sequence numbers); the rest are deleted and
+    re-created from the stored file.
+    """
+    stale = func.now() - timedelta(seconds=settings.ingest_lease_seconds)
+    async with AsyncSessionLocal() as db:
+        # Locked, so two processes recovering at once never both take the same job
+        interrupted = (
+            await db.execute(
+                select(IngestJob.id, IngestJob.pdf_id)
+                .where(
+                    IngestJob.stage.in_(INTERRUPTED_STAGES),
+                    func.coalesce(IngestJob.heartbeat_at, IngestJob.updated_at) < stale,
+                )
+                .with_for_update(skip_locked=True)
+            )
+        ).all()
+        if not interrupted:
+            return []
+        job_ids = [job_id for job_id, _ in interrupted]
+        pdf_ids = [pdf_id for _, pdf_id in interrupted if pdf_id]
+        if pdf_ids:
+            await db.execute(delete(Chunk).where(Chunk.pdf_id.in_(pdf_ids), Chunk.status != "done"))
+        await db.execute(
+            update(IngestJob)
+            .where(IngestJob.id.in_(job_ids))
+            .values(stage="queued", error=None, lease_owner=None, heartbeat_at=None)
+        )
+        await db.commit()
+    logger.warning("Re-queued interrupted ingest jobs", extra={"jobs": len(job_ids)})
+    return job_ids
+
+
+async def _recover_lapsed() -> None:
+    """Pick up, every lease period, jobs whose process died while its siblings kept running."""
+    while True:
+        await asyncio.sleep(settings.ingest_lease_seconds)
+        try:
+            for job_id in await _requeue_interrupted():
+                enqueue(job_id)
+        except Exception:
+            logger.exception("Could not recover interrupted ingest jobs")
+
+
+async def start_workers() -> None:
+    """Start the worker pool and re-enqueue jobs left queued or interrupted by a previous process."""
+    await _requeue_interrupted()
+    async with AsyncSessionLocal() as db:
+        queued = await db.scalars(
+            select(IngestJob.id).where(IngestJob.stage == "queued").order_by(IngestJob.created_at)
+        )
+        for job_id in queued:
+            enqueue(job_id)
+    for _ in range(settings.ingest_workers):
+        _workers.append(asyncio.create_task(_worker()))
+    _workers.append(asyncio.create_task(_recover_lapsed()))
+
+
+async def stop_workers() -> None:
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
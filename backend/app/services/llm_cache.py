@@ -0,0 +1,113 @@
+"""On-disk (SQLite) cache of parsed LLM question lists, with size and age eviction."""
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from app.config import settings
+from app.metrics import LLM_CACHE_BYTES
+
+# Other processes share the file, so the running total is re-summed from disk this often
+RESYNC_SECONDS = 300
+# A hit only rewrites accessed_at if the stored one is older than this; LRU order at this resolution is plenty
+ACCESS_RESOLUTION_SECONDS = 3600
+
+
+def make_key(model: str, system_prompt: str, chunk: str, n: int, temperature: float) -> str:
+    prompt_hash = hashlib.sha256(system_prompt.encode()).hexdigest()
+    chunk_hash = hashlib.sha256(chunk.encode()).hexdigest()
+    return hashlib.sha256(f"{model}|{prompt_hash}|{chunk_hash}|{n}|{temperature}".encode()).hexdigest()
+
+
+class LLMCache:
+    """Blocking SQLite access; async callers use aget/aput, which run it in a worker thread."""
+
+    def __init__(self, path: str, max_bytes: int, max_age_seconds: int):
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_accessed_at ON llm_cache (accessed_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_created_at ON llm_cache (created_at)")
+        # Summed here (and every RESYNC_SECONDS), kept up to date on every insert and delete in between
+        self._resync(time.time())
+        LLM_CACHE_BYTES.set(self._total)
+
+    def _resync(self, now: float) -> None:
+        self._total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+        self._synced_at = now
+
+    def get(self, key: str) -> list[dict[str, Any]] | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, accessed_at FROM llm_cache WHERE key = ? AND created_at >= ?",
+                (key, now - self.max_age_seconds),
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > ACCESS_RESOLUTION_SECONDS:
+                self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def put(self, key: str, questions: list[dict[str, Any]]) -> None:
+        value = json.dumps(questions)
+        now = time.time()
+        with self._lock:
+            if now - self._synced_at > RESYNC_SECONDS:
+                self._resync(now)
+            replaced = self._conn.execute("SELECT size FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), now, now),
+            )
+            self._total += len(value) - (replaced[0] if replaced else 0)
+            self._evict(now)
+            LLM_CACHE_BYTES.set(self._total)
+
+    def _evict(self, now: float) -> None:
+        cutoff = now - self.max_age_seconds
+        # Both statements are range scans on the created_at index
+        expired = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM llm_cache WHERE created_at < ?", (cutoff,)
+        ).fetchone()[0]
+        if expired:
+            self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (cutoff,))
+            self._total -= expired
+        if self._total <= self.max_bytes:
+            return
+        # Drop least recently used entries until we are back under the cap
+        excess = self._total - self.max_bytes
+        freed = 0
+        stale = []
+        for key, size in self._conn.execute("SELECT key, size FROM llm_cache ORDER BY accessed_at"):
+            stale.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self._conn.executemany("DELETE FROM llm_cache WHERE key = ?", stale)
+        self._total -= freed
+
+    async def aget(self, key: str) -> list[dict[str, Any]] | None:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aput(self, key: str, questions: list[dict[str, Any]]) -> None:
+        await asyncio.to_thread(self.put, key, questions)
+
+
+llm_cache = (
+    LLMCache(settings.llm_cache_path, settings.llm_cache_max_bytes, settings.llm_cache_max_age_seconds)
+    if settings.llm_cache_enabled
+    else None
+)
@@ -0,0 +1,74 @@
+"""Process-wide token-bucket scheduler for LLM calls (TPM + RPM budgets)."""
+import asyncio
+import time
+
+from app.config import settings
+
+
+class TokenBucketScheduler:
+    """Two token buckets (tokens/min and requests/min) refilled continuously.
+
+    Callers await acquire(estimated_tokens) before each call and settle() what it
+    returned against the real usage afterwards; waiters are served FIFO and
+    dispatched as soon as both buckets hold enough budget. A 429 pauses every
+    caller until the server's retry-after has elapsed.
+    """
+
+    def __init__(self, tpm: int, rpm: int):
+        self.tpm = max(1, tpm)
+        self.rpm = max(1, rpm)
+        self._tokens = float(self.tpm)
+        self._requests = float(self.rpm)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+        self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        self._updated = now
+
+    async def acquire(self, tokens: int) -> int:
+        """Wait for budget and charge it; returns the tokens actually charged."""
+        # A single call larger than the whole bucket would otherwise wait forever
+        tokens = min(tokens, self.tpm)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._blocked_until - now
+                if wait <= 0:
+                    wait = max(
+                        (tokens - self._tokens) * 60 / self.tpm,
+                        (1 - self._requests) * 60 / self.rpm,
+                    )
+                    if wait <= 0:
+                        self._tokens -= tokens
+                        self._requests -= 1
+                        return tokens
+                await asyncio.sleep(wait)
+
+    def settle(self, charged: int, actual: int) -> None:
+        """Correct the token bucket once the real usage of a call is known.
+
+        `charged` is what acquire() returned, which for an oversized call is less than the estimate;
+        the bucket may go negative so the overshoot delays later callers.
+        """
+        self._refill(time.monotonic())
+        self._tokens = min(self.tpm, self._tokens + charged - actual)
+
+    def backoff(self, retry_after: float) -> None:
+        """Stop dispatching for retry_after seconds and drain the buckets (server says we are over budget)."""
+        now = time.monotonic()
+        self._refill(now)
+        self._blocked_until = max(self._blocked_until, now + retry_after)
+        self._tokens = 0.0
+        self._requests = 0.0
+
+
+# Limits are per API key; with several uvicorn workers each process gets an equal share
+scheduler = TokenBucketScheduler(
+    tpm=settings.llm_tpm_limit // max(1, settings.llm_process_count),
+    rpm=settings.llm_rpm_limit // max(1, settings.llm_process_count),
+)
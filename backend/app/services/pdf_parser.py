@@ -1,57 +1,257 @@
 """PyMuPDF extraction + chunking logic."""
+import asyncio
+import hashlib
+import multiprocessing
 import os
 import re
+import time
+import uuid
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import AsyncIterable, AsyncIterator, Callable, Iterable, Iterator, Protocol
 
 import fitz  # PyMuPDF
 from app.config import settings
+from app.metrics import CHUNKS, STAGE_SECONDS
+from app.services.tokenizer import Tokenizer, boundaries, get_tokenizer
 
-# ~4 chars per token for English
-CHARS_PER_TOKEN = 4
-MAX_CHARS = settings.max_chunk_tokens * CHARS_PER_TOKEN
-OVERLAP_CHARS = 100 * CHARS_PER_TOKEN
+
+def iter_pdf_pages(file_path: str) -> Iterator[str]:
+    """Yield page text one page at a time so callers never hold the whole document."""
+    with fitz.open(file_path) as doc:
+        for page in doc:
+            yield page.get_text()
 
 
 def extract_text_from_pdf(file_path: str) -> str:
-    doc = fitz.open(file_path)
-    text_parts = []
-    for page in doc:
-        text_parts.append(page.get_text())
-    doc.close()
-    return "\n\n".join(text_parts)
+    return "\n\n".join(iter_pdf_pages(file_path))
+
+
+_extract_pool: ProcessPoolExecutor | None = None
+
+
+def _get_extract_pool() -> ProcessPoolExecutor:
+    global _extract_pool
+    if _extract_pool is None:
+        # spawn, not fork: the server process has an event loop and threads running
+        _extract_pool = ProcessPoolExecutor(
+            max_workers=settings.extract_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _extract_pool
+
+
+def shutdown_extract_pool() -> None:
+    global _extract_pool
+    if _extract_pool is not None:
+        _extract_pool.shutdown(wait=False, cancel_futures=True)
+        _extract_pool = None
+
+
+def _page_count(file_path: str) -> int:
+    with fitz.open(file_path) as doc:
+        return doc.page_count
+
+
+def _extract_page_range(file_path: str, start: int, stop: int) -> tuple[list[str], float]:
+    """Runs in a worker process, so it reports its own duration for the parent to record."""
+    began = time.perf_counter()
+    with fitz.open(file_path) as doc:
+        pages = [doc[i].get_text() for i in range(start, stop)]
+    return pages, time.perf_counter() - began
+
+
+async def _pages_of(future: asyncio.Future) -> list[str]:
+    pages, elapsed = await future
+    STAGE_SECONDS.labels("extract").observe(elapsed)
+    return pages
+
+
+async def aiter_pdf_pages(file_path: str) -> AsyncIterator[str]:
+    """Parse page ranges in parallel worker processes and yield pages in document order.
+
+    Only a window of ranges is in flight at once, so a huge document never sits in memory whole.
+    """
+    loop = asyncio.get_running_loop()
+    pool = _get_extract_pool()
+    total = await loop.run_in_executor(pool, _page_count, file_path)
+    size = max(1, settings.extract_pages_per_task)
+    window = 2 * settings.extract_workers
+    pending: deque[asyncio.Future] = deque()
+    try:
+        for start in range(0, total, size):
+            pending.append(loop.run_in_executor(pool, _extract_page_range, file_path, start, min(start + size, total)))
+            if len(pending) >= window:
+                for page in await _pages_of(pending.popleft()):
+                    yield page
+        while pending:
+            for page in await _pages_of(pending.popleft()):
+                yield page
+    finally:
+        for fut in pending:
+            fut.cancel()
+
+
+class StreamingChunker:
+    """Incremental, token-accurate chunker: feed() text as it arrives, get back every chunk that has filled.
+
+    Each piece of text is tokenized and scanned for sentence/paragraph boundaries exactly once; packing
+    then only bisects those offsets, so the total work is linear in the input. Only the unfinished tail
+    (at most max_tokens plus the latest page) is kept in memory.
+    """
 
+    def __init__(
+        self,
+        max_tokens: int | None = None,
+        overlap_tokens: int | None = None,
+        tokenizer: Tokenizer | None = None,
+    ):
+        self.max_tokens = max(2, max_tokens or settings.max_chunk_tokens)
+        overlap = settings.chunk_overlap_tokens if overlap_tokens is None else overlap_tokens
+        # Every chunk must move the window forward by at least half its size
+        self.overlap = max(0, min(overlap, self.max_tokens // 2 - 1))
+        self.tokenizer = tokenizer or get_tokenizer()
+        self._buf = ""
+        self._ends: list[int] = []  # token end offsets into _buf
+        self._breaks: list[int] = []  # boundary offsets into _buf, ascending
 
-def chunk_text(text: str, max_chars: int = MAX_CHARS, overlap: int = OVERLAP_CHARS) -> list[str]:
+    def _append(self, text: str) -> None:
+        piece = f"\n\n{text}" if self._buf else text.lstrip()
+        base = len(self._buf)
+        self._buf += piece
+        self._ends.extend(base + e for e in self.tokenizer.token_ends(piece))
+        self._breaks.extend(base + b for b in boundaries(piece))
+
+    def feed(self, text: str) -> list[str]:
+        if not text:
+            return []
+        self._append(text)
+        chunks = []
+        ends, breaks, buf = self._ends, self._breaks, self._buf
+        half = self.max_tokens // 2
+        first = 0  # index of the first token of the next chunk
+        while len(ends) - first > self.max_tokens:
+            start = ends[first - 1] if first else 0
+            limit = first + self.max_tokens
+            # Prefer the last boundary in the back half of the window
+            i = bisect_right(breaks, ends[limit - 1]) - 1
+            if i >= 0 and breaks[i] > ends[first + half - 1]:
+                stop = breaks[i]
+                last = bisect_right(ends, stop)
+            else:
+                stop = ends[limit - 1]
+                last = limit
+            chunk = buf[start:stop].strip()
+            if chunk:
+                chunks.append(chunk)
+            first = max(last - self.overlap, first + 1)
+        if first:
+            cut = ends[first - 1]
+            self._buf = buf[cut:]
+            self._ends = [e - cut for e in ends[first:]]
+            self._breaks = [b - cut for b in breaks[bisect_right(breaks, cut):]]
+        return chunks
+
+    def finish(self) -> list[str]:
+        chunk = self._buf.strip()
+        self._buf = ""
+        self._ends = []
+        self._breaks = []
+        return [chunk] if chunk else []
+
+
+def _timed(step: Callable[[], list[str]]) -> list[str]:
+    with STAGE_SECONDS.labels("chunk").time():
+        chunks = step()
+    CHUNKS.inc(len(chunks))
+    return chunks
+
+
+def iter_chunks(
+    pages: Iterable[str], max_tokens: int | None = None, overlap_tokens: int | None = None
+) -> Iterator[str]:
+    chunker = StreamingChunker(max_tokens, overlap_tokens)
+    for page in pages:
+        yield from _timed(lambda: chunker.feed(page))
+    yield from _timed(chunker.finish)
+
+
+async def aiter_chunks(
+    pages: AsyncIterable[str], max_tokens: int | None = None, overlap_tokens: int | None = None
+) -> AsyncIterator[str]:
+    chunker = StreamingChunker(max_tokens, overlap_tokens)
+    async for page in pages:
+        for chunk in _timed(lambda: chunker.feed(page)):
+            yield chunk
+    for chunk in _timed(chunker.finish):
+        yield chunk
+
+
+def chunk_text(text: str, max_tokens: int | None = None, overlap_tokens: int | None = None) -> list[str]:
     if not text or not text.strip():
         return []
-    chunks = []
-    start = 0
-    text = text.strip()
-    while start < len(text):
-        end = start + max_chars
-        if end < len(text):
-            # Try to break at sentence or paragraph
-            chunk = text[start:end]
-            last_break = max(
-                chunk.rfind("\n\n"),
-                chunk.rfind(". "),
-                chunk.rfind("? "),
-                chunk.rfind("! "),
-            )
-            if last_break > max_chars // 2:
-                end = start + last_break + 1
-        chunk = text[start:end].strip()
-        if chunk:
-            chunks.append(chunk)
-        start = end - overlap if end < len(text) else len(text)
-    return chunks
+    return list(iter_chunks([text.strip()], max_tokens, overlap_tokens))
+
+
+class UploadTooLarge(Exception):
+    pass
+
 
+class _AsyncReadable(Protocol):
+    async def read(self, size: int = -1) -> bytes: ...
 
-def save_upload_file(file_content: bytes, filename: str, upload_dir: str | None = None) -> str:
+
+async def save_upload_stream(
+    file: _AsyncReadable,
+    filename: str,
+    upload_dir: str | None = None,
+    max_bytes: int | None = None,
+    block_size: int | None = None,
+) -> tuple[str, str, int]:
+    """Copy an upload to disk in fixed-size blocks, hashing as it arrives. Returns (path, sha256, size).
+
+    Raises UploadTooLarge as soon as more than max_bytes have been read; the partial file is removed.
+    Every filesystem call runs in a thread, so a slow disk never stalls the event loop.
+    """
     upload_dir = upload_dir or settings.upload_dir
-    Path(upload_dir).mkdir(parents=True, exist_ok=True)
+    max_bytes = max_bytes or settings.max_upload_bytes
+    block_size = block_size or settings.upload_block_size
+    await asyncio.to_thread(Path(upload_dir).mkdir, parents=True, exist_ok=True)
     safe_name = re.sub(r'[^\w\s.-]', '_', filename)[:200]
+    # Prefix with a uuid so concurrent uploads with the same name never clobber a file a job still needs
+    safe_name = f"{uuid.uuid4().hex}_{safe_name}"
     path = os.path.join(upload_dir, safe_name)
-    with open(path, "wb") as f:
-        f.write(file_content)
-    return path
+    digest = hashlib.sha256()
+    size = 0
+    read_seconds = save_seconds = 0.0
+    f = await asyncio.to_thread(open, path, "wb")
+
+    def save(block: bytes) -> None:
+        # sha256 releases the GIL on large buffers, so hashing shares the thread with the write
+        digest.update(block)
+        f.write(block)
+
+    try:
+        try:
+            while True:
+                began = time.perf_counter()
+                block = await file.read(block_size)
+                read_seconds += time.perf_counter() - began
+                if not block:
+                    break
+                size += len(block)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"File exceeds {max_bytes} bytes")
+                began = time.perf_counter()
+                await asyncio.to_thread(save, block)
+                save_seconds += time.perf_counter() - began
+        finally:
+            await asyncio.to_thread(f.close)
+    except BaseException:
+        await asyncio.to_thread(os.remove, path)
+        raise
+    STAGE_SECONDS.labels("upload_read").observe(read_seconds)
+    STAGE_SECONDS.labels("upload_save").observe(save_seconds)
+    return path, digest.hexdigest(), size
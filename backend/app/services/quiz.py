@@ -1,47 +1,220 @@
-"""Question retrieval, weak topic prioritization."""
+"""Question retrieval (spaced-repetition due queue, random sampling of new questions) and answer recording."""
+import base64
+import binascii
+import hashlib
+import json
+import random
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any
 from uuid import UUID
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, Integer
+from sqlalchemy import func, insert, literal, select, true, tuple_
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
-from app.models import Question, Attempt
+from app.models import PDF, Question, Attempt, ReviewState
+from app.services.review import update_reviews
+from app.services.revisions import bump_attempts_revision
+from app.services.stats import bump_rollups
 
 
-def get_questions_for_quiz(db: Session, pdf_id: UUID, user_id: UUID, limit: int = 10):
-    """Get questions for a quiz, prioritizing unanswered and previously wrong."""
-    # Subquery: user's attempts per question
-    attempted = (
-        db.query(Attempt.question_id, func.max(func.cast(Attempt.is_correct, Integer)).label("last_correct"))
-        .filter(Attempt.user_id == user_id)
-        .group_by(Attempt.question_id)
-        .subquery()
+# The review feed walks due items, then new questions from the pivot up to 1, then from 0 up to the pivot
+REVIEW_PHASES = ("due", "new", "wrapped", "end")
+
+
+def sample_pivot(*parts: Any) -> float:
+    """A start point in [0, 1) for the walk over rand_key, derived from parts so a cached body matches its ETag."""
+    digest = hashlib.sha256(":".join(str(p) for p in parts).encode()).digest()
+    return int.from_bytes(digest[:8], "big") / 2**64
+
+
+def _unseen(user_id: UUID):
+    return ~(
+        select(ReviewState.question_id)
+        .where(ReviewState.user_id == user_id, ReviewState.question_id == Question.id)
+        .exists()
     )
-    # Prioritize: never attempted first, then wrong, then right
-    questions = (
-        db.query(Question)
-        .filter(Question.pdf_id == pdf_id)
-        .outerjoin(attempted, Question.id == attempted.c.question_id)
-        .order_by(
-            attempted.c.last_correct.asc().nulls_first(),
-            Question.id,
-        )
-        .limit(limit)
-        .all()
+
+
+def _after(columns: tuple, key: tuple | None, key_type) -> list:
+    if key is None:
+        return []
+    return [tuple_(*columns) > tuple_(literal(key[0], key_type), literal(key[1], PG_UUID(as_uuid=True)))]
+
+
+async def get_questions_for_quiz(
+    db: AsyncSession, pdf_id: UUID, user_id: UUID, limit: int = 10, pivot: float | None = None
+):
+    """Get questions for a quiz: due reviews first, then never-seen questions, then the soonest due.
+
+    New questions come in rand_key order starting at `pivot` (random if not given) and wrapping
+    around, so users do not all get the same first questions. Every step is an index range scan;
+    attempt history is never aggregated here.
+    """
+    if pivot is None:
+        pivot = random.random()
+    now = func.now()
+    picked: list[Question] = []
+
+    async def take(stmt) -> None:
+        picked.extend((await db.scalars(stmt.limit(limit - len(picked)))).all())
+
+    due = (
+        select(Question)
+        .join(ReviewState, ReviewState.question_id == Question.id)
+        .where(ReviewState.user_id == user_id, ReviewState.pdf_id == pdf_id)
+    )
+    await take(due.where(ReviewState.due_at <= now).order_by(ReviewState.due_at))
+    new = (
+        select(Question)
+        .where(Question.pdf_id == pdf_id, _unseen(user_id))
+        .order_by(Question.rand_key, Question.id)
     )
-    return questions
+    if len(picked) < limit:
+        await take(new.where(Question.rand_key >= pivot))
+    if len(picked) < limit:
+        await take(new.where(Question.rand_key < pivot))
+    if len(picked) < limit:
+        await take(due.where(ReviewState.due_at > now).order_by(ReviewState.due_at))
+    return picked
 
 
-def record_attempt(db: Session, user_id: UUID, question_id: UUID, selected: str) -> tuple[bool, str, str]:
-    """Record answer and return (is_correct, correct_answer, explanation)."""
-    q = db.query(Question).filter(Question.id == question_id).first()
-    if not q:
-        raise ValueError("Question not found")
-    is_correct = q.answer.upper() == selected.upper()
-    attempt = Attempt(
-        user_id=user_id,
-        question_id=question_id,
-        selected=selected,
-        is_correct=is_correct,
+@dataclass
+class ReviewCursor:
+    """Position in the review feed; opaque to clients."""
+
+    phase: str
+    as_of: datetime  # due items are those due at the first page, so the feed does not shift under the client
+    pivot: float
+    after: tuple | None = None  # last (due_at, question_id) or (rand_key, question_id) returned
+
+    def encode(self) -> str:
+        after = None
+        if self.after:
+            key = self.after[0].isoformat() if isinstance(self.after[0], datetime) else self.after[0]
+            after = [key, str(self.after[1])]
+        data = dict(p=self.phase, t=self.as_of.isoformat(), v=self.pivot, a=after)
+        return base64.urlsafe_b64encode(json.dumps(data, separators=(",", ":")).encode()).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, token: str) -> "ReviewCursor":
+        """Raises ValueError for anything that is not a cursor this module produced."""
+        try:
+            data = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+            phase = data["p"]
+            if phase not in REVIEW_PHASES:
+                raise ValueError(phase)
+            after = data["a"]
+            if after is not None:
+                key = datetime.fromisoformat(after[0]) if phase == "due" else float(after[0])
+                after = (key, UUID(after[1]))
+            return cls(phase=phase, as_of=datetime.fromisoformat(data["t"]), pivot=float(data["v"]), after=after)
+        except (binascii.Error, UnicodeDecodeError, KeyError, IndexError, TypeError, ValueError) as e:
+            raise ValueError("Invalid cursor") from e
+
+
+async def get_review_page(
+    db: AsyncSession, user_id: UUID, pdf_ids: list[UUID] | None, limit: int, cursor: str | None = None
+) -> tuple[list[Question], str | None]:
+    """One page of a "review everything" quiz over several (default: all) of the user's PDFs.
+
+    Due reviews come first in due order, then never-seen questions in random order. Both are
+    keyset-paginated, so page N costs the same as page 1 however large the question bank is.
+    Returns (questions, next_cursor); next_cursor is None once the feed is exhausted.
+    """
+    c = ReviewCursor.decode(cursor) if cursor else ReviewCursor("due", datetime.now(timezone.utc), random.random())
+    owned = select(PDF.id).where(PDF.user_id == user_id)
+    if pdf_ids:
+        owned = owned.where(PDF.id.in_(pdf_ids))
+    owned = owned.subquery()
+    picked: list[Question] = []
+    while len(picked) < limit and c.phase != "end":
+        n = limit - len(picked)
+        if c.phase == "due":
+            stmt = (
+                select(Question, ReviewState.due_at)
+                .join(ReviewState, ReviewState.question_id == Question.id)
+                .where(
+                    ReviewState.user_id == user_id,
+                    ReviewState.due_at <= c.as_of,
+                    *_after((ReviewState.due_at, ReviewState.question_id), c.after, ReviewState.due_at.type),
+                )
+                .order_by(ReviewState.due_at, ReviewState.question_id)
+                .limit(n)
+            )
+            if pdf_ids:
+                stmt = stmt.where(ReviewState.pdf_id.in_(pdf_ids))
+            rows = (await db.execute(stmt)).all()
+            picked.extend(q for q, _ in rows)
+            last = (rows[-1][1], rows[-1][0].id) if rows else None
+        else:
+            in_range = Question.rand_key >= c.pivot if c.phase == "new" else Question.rand_key < c.pivot
+            # One index range scan per PDF (LATERAL), merged and cut to n: cost grows with the page
+            # size and number of PDFs, not with the size of the bank
+            per_pdf = (
+                select(Question)
+                .where(
+                    Question.pdf_id == owned.c.id,
+                    in_range,
+                    _unseen(user_id),
+                    *_after((Question.rand_key, Question.id), c.after, Question.rand_key.type),
+                )
+                .order_by(Question.rand_key, Question.id)
+                .limit(n)
+                .lateral()
+            )
+            q = aliased(Question, per_pdf)
+            merged = select(q).select_from(owned).join(per_pdf, true()).order_by(q.rand_key, q.id).limit(n)
+            rows = (await db.scalars(merged)).all()
+            picked.extend(rows)
+            last = (rows[-1].rand_key, rows[-1].id) if rows else None
+        if len(rows) == n:
+            c.after = last
+        else:
+            c.phase = REVIEW_PHASES[REVIEW_PHASES.index(c.phase) + 1]
+            c.after = None
+    return picked, (c.encode() if c.phase != "end" else None)
+
+
+async def record_attempts(
+    db: AsyncSession, user_id: UUID, answers: list[tuple[UUID, str]]
+) -> list[tuple[bool, str, str]]:
+    """Grade and record many answers with one SELECT, one bulk INSERT and one COMMIT.
+
+    Stats rollups and spaced-repetition review states are updated in the same transaction.
+
+    Returns (is_correct, correct_answer, explanation) per answer, in input order. Raises ValueError if
+    a question does not exist or belongs to another user's PDF.
+    """
+    ids = {qid for qid, _ in answers}
+    found = await db.execute(
+        select(Question.id, Question.pdf_id, Question.difficulty, Question.answer, Question.explanation)
+        .join(PDF, PDF.id == Question.pdf_id)
+        .where(Question.id.in_(ids), PDF.user_id == user_id)
     )
-    db.add(attempt)
-    db.commit()
-    return is_correct, q.answer, q.explanation
\ No newline at end of file
+    questions = {row.id: row for row in found}
+    missing = ids - questions.keys()
+    if missing:
+        raise ValueError(f"Question not found: {', '.join(str(m) for m in missing)}")
+    results = []
+    rows = []
+    graded = []
+    for qid, selected in answers:
+        q = questions[qid]
+        is_correct = q.answer.upper() == selected.upper()
+        rows.append(dict(user_id=user_id, question_id=qid, selected=selected, is_correct=is_correct))
+        graded.append((qid, q.pdf_id, q.difficulty, is_correct))
+        results.append((is_correct, q.answer, q.explanation))
+    if rows:
+        await db.execute(insert(Attempt), rows)
+        await bump_rollups(db, user_id, ((pdf_id, diff, ok) for _, pdf_id, diff, ok in graded))
+        await update_reviews(db, user_id, ((qid, pdf_id, ok) for qid, pdf_id, _, ok in graded))
+        await bump_attempts_revision(db, user_id)
+    await db.commit()
+    return results
+
+
+async def record_attempt(db: AsyncSession, user_id: UUID, question_id: UUID, selected: str) -> tuple[bool, str, str]:
+    """Record answer and return (is_correct, correct_answer, explanation)."""
+    return (await record_attempts(db, user_id, [(question_id, selected)]))[0]
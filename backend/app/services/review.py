@@ -0,0 +1,85 @@
+"""Leitner-box spaced repetition: per-user review state and the due queue."""
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import ReviewState
+
+# How long a question rests in each box before it is due again
+BOX_INTERVALS = {
+    1: timedelta(minutes=10),
+    2: timedelta(days=1),
+    3: timedelta(days=3),
+    4: timedelta(days=7),
+    5: timedelta(days=16),
+}
+MAX_BOX = max(BOX_INTERVALS)
+
+
+def next_box(box: int | None, is_correct: bool) -> int:
+    """Right answers move up one box (a new question starts in box 2), wrong answers go back to box 1."""
+    if not is_correct:
+        return 1
+    return min((box or 1) + 1, MAX_BOX)
+
+
+async def update_reviews(
+    db: AsyncSession, user_id: UUID, graded: Iterable[tuple[UUID, UUID, bool]]
+) -> None:
+    """Apply (question_id, pdf_id, is_correct) results in order; caller commits.
+
+    The user's rows for these questions are locked before the new boxes are computed, so two submits
+    for the same question (a double click, two tabs) apply one after the other instead of both
+    starting from the same old state.
+    """
+    graded = list(graded)
+    if not graded:
+        return
+    pdf_ids = {qid: pdf_id for qid, pdf_id, _ in graded}
+    order = sorted(pdf_ids, key=str)  # one lock order for every caller
+    now = datetime.now(timezone.utc)
+    # A first answer has no row to lock yet; create one (reps=0 marks it never reviewed) so concurrent
+    # first answers also queue on the row lock rather than racing on the insert
+    await db.execute(
+        pg_insert(ReviewState)
+        .values([
+            dict(
+                user_id=user_id, question_id=qid, pdf_id=pdf_ids[qid],
+                box=1, reps=0, lapses=0, due_at=now, last_reviewed_at=now,
+            )
+            for qid in order
+        ])
+        .on_conflict_do_nothing(index_elements=[ReviewState.user_id, ReviewState.question_id])
+    )
+    existing = await db.execute(
+        select(ReviewState.question_id, ReviewState.box, ReviewState.reps, ReviewState.lapses)
+        .where(ReviewState.user_id == user_id, ReviewState.question_id.in_(order))
+        .order_by(ReviewState.question_id)
+        .with_for_update()
+    )
+    states = {qid: dict(box=box if reps else None, reps=reps, lapses=lapses) for qid, box, reps, lapses in existing}
+    for qid, pdf_id, is_correct in graded:
+        prev = states.get(qid, dict(box=None, reps=0, lapses=0))
+        box = next_box(prev["box"], is_correct)
+        states[qid] = dict(
+            user_id=user_id,
+            question_id=qid,
+            pdf_id=pdf_id,
+            box=box,
+            reps=prev["reps"] + 1,
+            lapses=prev["lapses"] + (0 if is_correct else 1),
+            due_at=now + BOX_INTERVALS[box],
+            last_reviewed_at=now,
+        )
+    rows = [states[qid] for qid in order]
+    stmt = pg_insert(ReviewState).values(rows)
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[ReviewState.user_id, ReviewState.question_id],
+            set_={c: getattr(stmt.excluded, c) for c in ("box", "reps", "lapses", "due_at", "last_reviewed_at")},
+        )
+    )
@@ -0,0 +1,33 @@
+"""Cheap change markers behind the ETags of the read endpoints."""
+from uuid import UUID
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import PDF, User
+
+
+async def bump_pdfs_revision(db: AsyncSession, user_id: UUID) -> None:
+    """The user's PDF list changed (upload, delete, ingest finished); caller commits."""
+    await db.execute(update(User).where(User.id == user_id).values(pdfs_revision=User.pdfs_revision + 1))
+
+
+async def bump_attempts_revision(db: AsyncSession, user_id: UUID) -> None:
+    """The user answered questions; caller commits."""
+    await db.execute(update(User).where(User.id == user_id).values(attempts_revision=User.attempts_revision + 1))
+
+
+async def bump_pdf_revision(db: AsyncSession, pdf_id: UUID) -> None:
+    """Questions were added to the PDF; caller commits."""
+    await db.execute(update(PDF).where(PDF.id == pdf_id).values(revision=PDF.revision + 1))
+
+
+async def get_markers(db: AsyncSession, user_id: UUID, pdf_id: UUID | None = None) -> tuple[int, int, int | None]:
+    """(pdfs_revision, attempts_revision, pdf revision or None if missing) in one primary-key lookup."""
+    columns = [User.pdfs_revision, User.attempts_revision]
+    if pdf_id:
+        columns.append(select(PDF.revision).where(PDF.id == pdf_id).scalar_subquery())
+    row = (await db.execute(select(*columns).where(User.id == user_id))).first()
+    if not row:
+        return 0, 0, None
+    return row[0], row[1], row[2] if pdf_id else None
@@ -0,0 +1,106 @@
+"""Score stats from the per (user, pdf, difficulty) rollup table."""
+from collections import defaultdict
+from typing import Iterable
+from uuid import UUID
+
+from sqlalchemy import delete, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models import PDF, StatsRollup
+from app.schemas.stats import StatsOut, PDFStatsOut, StatsOverview
+
+BACKFILL_SQL = text(
+    """
+    INSERT INTO stats_rollups (user_id, pdf_id, difficulty, total, correct)
+    SELECT a.user_id, q.pdf_id, q.difficulty, count(*), sum(a.is_correct::int)
+    FROM attempts a JOIN questions q ON q.id = a.question_id
+    GROUP BY a.user_id, q.pdf_id, q.difficulty
+    """
+)
+
+
+async def bump_rollups(db: AsyncSession, user_id: UUID, graded: Iterable[tuple[UUID, str, bool]]) -> None:
+    """Add (pdf_id, difficulty, is_correct) results to the user's rollups; caller commits."""
+    counts: dict[tuple[UUID, str], list[int]] = defaultdict(lambda: [0, 0])
+    for pdf_id, difficulty, is_correct in graded:
+        c = counts[(pdf_id, difficulty)]
+        c[0] += 1
+        c[1] += int(is_correct)
+    if not counts:
+        return
+    # Sorted so concurrent submits lock rollup rows in the same order
+    rows = [
+        dict(user_id=user_id, pdf_id=pdf_id, difficulty=diff, total=t, correct=c)
+        for (pdf_id, diff), (t, c) in sorted(counts.items(), key=lambda kv: (str(kv[0][0]), kv[0][1]))
+    ]
+    stmt = pg_insert(StatsRollup).values(rows)
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[StatsRollup.user_id, StatsRollup.pdf_id, StatsRollup.difficulty],
+            set_={
+                "total": StatsRollup.total + stmt.excluded.total,
+                "correct": StatsRollup.correct + stmt.excluded.correct,
+            },
+        )
+    )
+
+
+def _summarize(rows: Iterable[tuple[str, int, int]]) -> StatsOut:
+    total = correct = 0
+    by_difficulty = {}
+    for diff, t, c in rows:
+        total += t
+        correct += c
+        by_difficulty[diff] = {
+            "total": t,
+            "correct": c,
+            "accuracy": (c / t * 100) if t else 0,
+        }
+    accuracy = (correct / total * 100) if total else 0.0
+    return StatsOut(
+        total_attempts=total,
+        correct_count=correct,
+        accuracy_percent=round(accuracy, 1),
+        by_difficulty=by_difficulty,
+    )
+
+
+async def get_pdf_stats(db: AsyncSession, user_id: UUID, pdf_id: UUID) -> StatsOut:
+    rows = await db.execute(
+        select(StatsRollup.difficulty, StatsRollup.total, StatsRollup.correct).where(
+            StatsRollup.user_id == user_id, StatsRollup.pdf_id == pdf_id
+        )
+    )
+    return _summarize(rows)
+
+
+async def get_overview(db: AsyncSession, user_id: UUID) -> StatsOverview:
+    rows = await db.execute(
+        select(StatsRollup.pdf_id, PDF.filename, StatsRollup.difficulty, StatsRollup.total, StatsRollup.correct)
+        .join(PDF, PDF.id == StatsRollup.pdf_id)
+        .where(StatsRollup.user_id == user_id)
+    )
+    per_pdf: dict[UUID, tuple[str, list]] = {}
+    for pdf_id, filename, diff, t, c in rows:
+        per_pdf.setdefault(pdf_id, (filename, []))[1].append((diff, t, c))
+    overall_by_diff: dict[str, list[int]] = defaultdict(lambda: [0, 0])
+    pdfs = []
+    for pdf_id, (filename, diff_rows) in per_pdf.items():
+        for diff, t, c in diff_rows:
+            overall_by_diff[diff][0] += t
+            overall_by_diff[diff][1] += c
+        pdfs.append(PDFStatsOut(pdf_id=pdf_id, filename=filename, **_summarize(diff_rows).model_dump()))
+    overall = _summarize((diff, t, c) for diff, (t, c) in overall_by_diff.items())
+    return StatsOverview(overall=overall, pdfs=pdfs)
+
+
+def backfill_rollups(db: Session) -> int:
+    """Rebuild every rollup from the attempts table. Returns the number of rollup rows written."""
+    # Submits block on the lock until we commit, then add their attempts on top of the rebuilt counts
+    db.execute(text("LOCK TABLE stats_rollups IN EXCLUSIVE MODE"))
+    db.execute(delete(StatsRollup))
+    written = db.execute(BACKFILL_SQL).rowcount
+    db.commit()
+    return written
@@ -0,0 +1,58 @@
+"""Token revocation persisted in the DB and pulled into each process's TokenCache every few seconds."""
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models import RevokedToken
+from app.utils.token_cache import TokenCache, token_digest
+
+# revoked_at is the revoking transaction's start time, so a row can commit a little after a later
+# timestamp was already synced; re-reading this much overlap catches it (re-applying is harmless)
+SYNC_OVERLAP = timedelta(seconds=60)
+
+_lock = asyncio.Lock()
+_synced_at = float("-inf")
+_watermark: datetime | None = None
+
+
+async def sync_revocations(cache: TokenCache) -> None:
+    """Copy revocations made by any process into `cache`, at most every TOKEN_REVOCATION_SYNC_SECONDS."""
+    global _synced_at, _watermark
+    if time.monotonic() - _synced_at < settings.token_revocation_sync_seconds:
+        return
+    async with _lock:
+        if time.monotonic() - _synced_at < settings.token_revocation_sync_seconds:
+            return
+        stmt = select(RevokedToken.token_digest, RevokedToken.expires_at, RevokedToken.revoked_at).where(
+            RevokedToken.expires_at > func.now()
+        )
+        if _watermark is not None:
+            stmt = stmt.where(RevokedToken.revoked_at > _watermark - SYNC_OVERLAP)
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(stmt)).all()
+        for digest, expires_at, revoked_at in rows:
+            cache.revoke_digest(digest, expires_at.timestamp())
+            if _watermark is None or revoked_at > _watermark:
+                _watermark = revoked_at
+        if _watermark is None:
+            _watermark = datetime.now(timezone.utc)
+        _synced_at = time.monotonic()
+
+
+async def revoke_token(db: AsyncSession, cache: TokenCache, token: str, exp: float) -> None:
+    """Record the revocation for every process and apply it to this one right away."""
+    await db.execute(
+        pg_insert(RevokedToken)
+        .values(token_digest=token_digest(token), expires_at=datetime.fromtimestamp(exp, timezone.utc))
+        .on_conflict_do_nothing(index_elements=[RevokedToken.token_digest])
+    )
+    # Expired tokens fail verification on their own
+    await db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= func.now()))
+    await db.commit()
+    cache.revoke(token, exp)
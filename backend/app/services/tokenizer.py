@@ -0,0 +1,71 @@
+"""Local tokenizers for chunk packing and rate-limit estimates: a BPE-like regex by default, tiktoken if configured."""
+import logging
+import re
+from functools import lru_cache
+from typing import Protocol
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Roughly how BPE vocabularies split English: a short word with its leading space is one token,
+# long words break every few letters, digits come in groups of up to 3, punctuation runs stick together.
+# The last two alternatives make the matches cover the text with no gaps.
+_TOKEN = re.compile(r" ?[^\W\d_]{1,8}| ?\d{1,3}| ?[^\w\s]+|\s+|\S")
+# Places a chunk may end: right after sentence punctuation (and any closing quote/bracket), or at a blank line
+_BOUNDARY = re.compile(r"[.?!][\"')\]]*(?=\s)|\n[ \t]*\n")
+
+
+class Tokenizer(Protocol):
+    name: str
+
+    def token_ends(self, text: str) -> list[int]:
+        """End offset of every token; consecutive tokens cover the text without gaps."""
+        ...
+
+    def count(self, text: str) -> int:
+        ...
+
+
+class RegexTokenizer:
+    name = "regex"
+
+    def token_ends(self, text: str) -> list[int]:
+        return [m.end() for m in _TOKEN.finditer(text)]
+
+    def count(self, text: str) -> int:
+        return sum(1 for _ in _TOKEN.finditer(text))
+
+
+class TiktokenTokenizer:
+    def __init__(self, encoding: str):
+        import tiktoken
+
+        self.name = encoding
+        self._enc = tiktoken.get_encoding(encoding)
+
+    def token_ends(self, text: str) -> list[int]:
+        tokens = self._enc.encode(text, disallowed_special=())
+        _, starts = self._enc.decode_with_offsets(tokens)
+        return starts[1:] + [len(text)] if starts else []
+
+    def count(self, text: str) -> int:
+        return len(self._enc.encode(text, disallowed_special=()))
+
+
+@lru_cache(maxsize=None)
+def get_tokenizer(name: str | None = None) -> Tokenizer:
+    """`regex`, or a tiktoken encoding name such as `cl100k_base` (needs the optional tiktoken package)."""
+    name = name or settings.chunk_tokenizer
+    if name == "regex":
+        return RegexTokenizer()
+    try:
+        return TiktokenTokenizer(name)
+    except ImportError:
+        logger.warning("tiktoken not installed; using the regex tokenizer instead of %s", name)
+        return RegexTokenizer()
+
+
+def boundaries(text: str) -> list[int]:
+    """Ascending offsets where a chunk may end without cutting a sentence."""
+    return [m.start() if m.group()[0] == "\n" else m.end() for m in _BOUNDARY.finditer(text)]
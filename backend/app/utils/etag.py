@@ -0,0 +1,77 @@
+"""Versioned ETags, If-None-Match handling and a small in-process response cache."""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.config import settings
+
+# Bump when a response shape changes so clients drop representations cached under the old one
+ETAG_VERSION = "v1"
+
+
+def make_etag(*parts: Any) -> str:
+    digest = hashlib.sha256("|".join(str(p) for p in (ETAG_VERSION, *parts)).encode()).hexdigest()[:32]
+    return f'W/"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison (RFC 9110 13.1.2): W/ prefixes are ignored
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+class ResponseCache:
+    """LRU of serialized bodies keyed by (request key, etag); a new etag simply never hits old entries."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple[str, str], bytes] = OrderedDict()
+
+    def get(self, key: str, etag: str) -> bytes | None:
+        with self._lock:
+            body = self._entries.get((key, etag))
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((key, etag))
+            self.hits += 1
+            return body
+
+    def put(self, key: str, etag: str, body: bytes) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[(key, etag)] = body
+            self._entries.move_to_end((key, etag))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+response_cache = ResponseCache(settings.response_cache_size)
+
+
+async def conditional_response(
+    request: Request, key: str, etag: str, build: Callable[[], Awaitable[Any]]
+) -> Response:
+    """304 if the client already has `etag`, else the cached or freshly built body. `build` only runs on a miss."""
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    body = response_cache.get(key, etag)
+    if body is None:
+        body = JSONResponse(jsonable_encoder(await build())).body
+        response_cache.put(key, etag, body)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,58 @@
+"""Per-request SQL query count and time, collected through SQLAlchemy engine events."""
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    seconds: float = 0.0
+    # Statement text -> executions, so repeated single-row selects (N+1) stand out
+    statements: dict[str, int] = field(default_factory=dict)
+
+    def top(self, n: int = 5) -> list[tuple[str, int]]:
+        return sorted(self.statements.items(), key=lambda kv: kv[1], reverse=True)[:n]
+
+
+# Set by the request middleware; SQLAlchemy runs the async driver in a greenlet that shares the caller's context
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def start() -> QueryStats:
+    stats = QueryStats()
+    _current.set(stats)
+    return stats
+
+
+def _before(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _current.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after(conn, cursor, statement, parameters, context, executemany) -> None:
+    stats = _current.get()
+    starts = conn.info.get("query_start")
+    if stats is None or not starts:
+        return
+    stats.count += 1
+    stats.seconds += time.perf_counter() - starts.pop()
+    stats.statements[statement] = stats.statements.get(statement, 0) + 1
+
+
+def _error(context) -> None:
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    starts = context.connection.info.get("query_start") if context.connection is not None else None
+    if starts:
+        starts.pop()
+
+
+def install(engine: Engine) -> None:
+    """Attach the listeners; for an AsyncEngine pass async_engine.sync_engine."""
+    if not event.contains(engine, "before_cursor_execute", _before):
+        event.listen(engine, "before_cursor_execute", _before)
+        event.listen(engine, "after_cursor_execute", _after)
+        event.listen(engine, "handle_error", _error)
@@ -0,0 +1,82 @@
+"""Bounded LRU cache of verified JWT payloads, keyed by token digest and expiring at the token's exp."""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class TokenCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        # digest -> exp; kept only until the token would have expired anyway
+        self._revoked: dict[str, float] = {}
+
+    def get(self, token: str) -> dict[str, Any] | None:
+        key = token_digest(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, token: str, payload: dict[str, Any]) -> None:
+        exp = payload.get("exp")
+        if not isinstance(exp, (int, float)) or self.max_entries <= 0:
+            return
+        key = token_digest(token)
+        with self._lock:
+            if key in self._revoked:
+                return
+            self._entries[key] = (float(exp), payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def is_revoked(self, token: str) -> bool:
+        key = token_digest(token)
+        with self._lock:
+            exp = self._revoked.get(key)
+            if exp is None:
+                return False
+            if exp <= time.time():
+                del self._revoked[key]
+                return False
+            return True
+
+    def revoke(self, token: str, exp: float) -> None:
+        self.revoke_digest(token_digest(token), exp)
+
+    def revoke_digest(self, key: str, exp: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._entries.pop(key, None)
+            self._revoked[key] = exp
+            # Expired tokens fail signature checks on their own, so their revocations can go
+            for k in [k for k, e in self._revoked.items() if e <= now]:
+                del self._revoked[k]
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "revoked": len(self._revoked),
+            }
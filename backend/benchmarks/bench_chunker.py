@@ -0,0 +1,52 @@
+"""Chunker throughput on synthetic text of growing size: time per MB should stay flat.
+
+Run from backend/: python -m benchmarks.bench_chunker [--sizes 1 2 4 8] [--page-chars 4000]
+"""
+import argparse
+import random
+import time
+
+from app.services.pdf_parser import chunk_text, iter_chunks
+from app.services.tokenizer import get_tokenizer
+
+WORDS = (
+    "the cell membrane regulates transport of ions and molecules between cytoplasm and environment "
+    "photosynthesis converts light energy into chemical energy stored in glucose 1998 3.14 (see fig. 2)"
+).split()
+
+
+def synthetic_text(n_chars: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    parts = []
+    size = 0
+    while size < n_chars:
+        sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 24))).capitalize()
+        sentence += rng.choice([". ", ". ", "? ", ".\n\n"])
+        parts.append(sentence)
+        size += len(sentence)
+    return "".join(parts)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 2, 4, 8], help="text sizes in MB")
+    parser.add_argument("--page-chars", type=int, default=4000, help="page size for the streaming run")
+    args = parser.parse_args()
+    tokenizer = get_tokenizer()
+    print(f"tokenizer={tokenizer.name}")
+    print(f"{'MB':>6} {'chunks':>7} {'whole s':>8} {'paged s':>8} {'s/MB':>6} {'max tok':>8}")
+    for mb in args.sizes:
+        text = synthetic_text(int(mb * 1024 * 1024))
+        start = time.perf_counter()
+        chunks = chunk_text(text)
+        whole = time.perf_counter() - start
+        pages = [text[i:i + args.page_chars] for i in range(0, len(text), args.page_chars)]
+        start = time.perf_counter()
+        sum(1 for _ in iter_chunks(pages))
+        paged = time.perf_counter() - start
+        biggest = max(tokenizer.count(c) for c in chunks)
+        print(f"{mb:>6.1f} {len(chunks):>7} {whole:>8.2f} {paged:>8.2f} {whole / mb:>6.2f} {biggest:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Compare two results files and fail on regressions.
+
+Run from backend/: python -m benchmarks.compare results/base.json results/new.json [--threshold 0.15]
+Exits 1 if any latency (*_ms) grew, or throughput (throughput_rps, *_per_s) dropped, by more than the threshold.
+"""
+import argparse
+import json
+import sys
+
+KEYS = ("benchmark", "scenario", "concurrency")
+
+
+def _direction(metric: str) -> bool | None:
+    """True if higher is better, False if lower is better, None if the field is not a compared metric."""
+    if metric == "throughput_rps" or metric.endswith("_per_s"):
+        return True
+    if metric.endswith("_ms"):
+        return False
+    return None
+
+
+def _index(document: dict) -> dict[tuple, dict]:
+    return {tuple(row.get(k) for k in KEYS): row for row in document["results"]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed relative change")
+    args = parser.parse_args()
+    with open(args.base) as f:
+        base = _index(json.load(f))
+    with open(args.new) as f:
+        new = _index(json.load(f))
+    regressions = 0
+    for key, row in new.items():
+        old = base.get(key)
+        if not old:
+            continue
+        label = " ".join(str(k) for k in key if k is not None)
+        for metric in row:
+            higher_is_better = _direction(metric)
+            if higher_is_better is None or not old.get(metric):
+                continue
+            change = (row[metric] - old[metric]) / old[metric]
+            worse = -change if higher_is_better else change
+            flag = "REGRESSION" if worse > args.threshold else "ok"
+            regressions += flag == "REGRESSION"
+            print(f"{flag:>10}  {label:<28} {metric:<15} {old[metric]:>10} -> {row[metric]:>10} ({change:+.1%})")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
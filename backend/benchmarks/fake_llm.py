@@ -0,0 +1,114 @@
+"""Stand-in for the Groq chat completions API with configurable latency and 429 behaviour.
+
+Run from backend/: python -m benchmarks.fake_llm --port 9000 --latency-ms 800 --jitter-ms 400 --rpm 30
+then start the app with GROQ_BASE_URL=http://localhost:9000 GROQ_API_KEY=fake.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+from collections import deque
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+_N_QUESTIONS = re.compile(r"Generate (\d+) quiz questions")
+_WORD = re.compile(r"[A-Za-z]{4,}")
+
+
+def fake_questions(content: str, n: int, rng: random.Random) -> list[dict]:
+    words = _WORD.findall(content) or ["topic"]
+    questions = []
+    for i in range(n):
+        # Distinct random wording per question so the near-duplicate filter keeps them
+        picked = " ".join(rng.choice(words) for _ in range(8))
+        questions.append({
+            "id": i + 1,
+            "question": f"Which statement about {picked} is supported by the text ({uuid.uuid4().hex[:8]})?",
+            "options": {k: " ".join(rng.choice(words) for _ in range(5)) for k in "ABCD"},
+            "answer": rng.choice("ABCD"),
+            "explanation": " ".join(rng.choice(words) for _ in range(15)),
+            "difficulty": rng.choice(["easy", "easy", "medium", "medium", "hard"]),
+        })
+    return questions
+
+
+def create_app(latency_ms: float, jitter_ms: float, rpm: int, error_rate: float, retry_after: float) -> FastAPI:
+    app = FastAPI(title="fake LLM")
+    rng = random.Random(0)
+    recent: deque[float] = deque()
+    stats = {"requests": 0, "rate_limited": 0}
+
+    def rate_limited() -> float | None:
+        """Seconds until a slot frees up if this request should get a 429."""
+        now = time.monotonic()
+        while recent and now - recent[0] >= 60:
+            recent.popleft()
+        if rpm and len(recent) >= rpm:
+            return 60 - (now - recent[0])
+        if error_rate and rng.random() < error_rate:
+            return retry_after
+        recent.append(now)
+        return None
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        stats["requests"] += 1
+        body = await request.json()
+        wait = rate_limited()
+        if wait is not None:
+            stats["rate_limited"] += 1
+            return JSONResponse(
+                {"error": {"message": "Rate limit reached", "type": "tokens", "code": "rate_limit_exceeded"}},
+                status_code=429,
+                headers={"retry-after": f"{wait:.2f}"},
+            )
+        await asyncio.sleep((latency_ms + rng.uniform(0, jitter_ms)) / 1000)
+        prompt = "\n".join(m.get("content", "") for m in body.get("messages", []))
+        match = _N_QUESTIONS.search(prompt)
+        n = int(match.group(1)) if match else 4
+        content = json.dumps({"questions": fake_questions(prompt, n, rng)})
+        prompt_tokens = len(prompt) // 4
+        completion_tokens = len(content) // 4
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [
+                {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-ms", type=float, default=800)
+    parser.add_argument("--jitter-ms", type=float, default=400)
+    parser.add_argument("--rpm", type=int, default=0, help="requests per minute before 429s (0 = unlimited)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=2.0, help="retry-after seconds for random 429s")
+    args = parser.parse_args()
+    app = create_app(args.latency_ms, args.jitter_ms, args.rpm, args.error_rate, args.retry_after)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""HTTP load test against a running app: throughput and p50/p99 per endpoint and concurrency level.
+
+Start Postgres, benchmarks.fake_llm and the app (GROQ_BASE_URL pointing at the fake), then from backend/:
+    python -m benchmarks.load --base-url http://localhost:8000 --concurrency 1 8 32 --out results/load.json
+
+An upload is timed until its ingestion job finishes, and upload levels run after all the others so
+background ingestion never overlaps the quiz/submit/stats measurements.
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from typing import Awaitable, Callable
+
+import httpx
+
+from benchmarks.results import summarize, write_results
+from benchmarks.synthetic_pdf import make_pdf
+
+SCENARIOS = ("upload", "quiz", "submit", "stats")
+
+
+async def register(client: httpx.AsyncClient) -> None:
+    email = f"bench-{uuid.uuid4().hex[:12]}@example.com"
+    r = await client.post("/auth/register", json={"email": email, "password": "bench-password"})
+    r.raise_for_status()
+    client.headers["Authorization"] = f"Bearer {r.json()['access_token']}"
+
+
+async def upload(client: httpx.AsyncClient, pdf: bytes, name: str) -> dict:
+    r = await client.post("/pdfs/upload", files={"file": (name, pdf, "application/pdf")})
+    r.raise_for_status()
+    return r.json()
+
+
+async def wait_for_job(client: httpx.AsyncClient, job_id: str, timeout: float) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = (await client.get(f"/pdfs/jobs/{job_id}")).json()
+        if job["stage"] in ("done", "failed"):
+            return job
+        await asyncio.sleep(0.5)
+    raise TimeoutError(f"job {job_id} not finished after {timeout}s")
+
+
+async def run_level(op: Callable[[int], Awaitable[None]], concurrency: int, total: int) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker() -> None:
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                await op(i)
+            except (httpx.HTTPError, KeyError, ValueError, TimeoutError):
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    limits = httpx.Limits(max_connections=max(args.concurrency) * 2)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        await register(client)
+        # One fully ingested PDF to read from and answer against
+        job = await upload(client, make_pdf(args.pages, seed=random.randrange(1 << 30)), "bench.pdf")
+        job = await wait_for_job(client, job["id"], args.wait_timeout)
+        if job["stage"] != "done":
+            raise SystemExit(f"setup ingest failed: {job.get('error')}")
+        pdf_id = job["pdf_id"]
+        await client.post("/quiz/generate", params={"pdf_id": pdf_id, "count": 50})
+        question_ids = [q["id"] for q in (await client.get(f"/quiz/{pdf_id}", params={"limit": 50})).json()]
+        if not question_ids:
+            raise SystemExit("setup produced no questions; is the fake LLM reachable?")
+        # Distinct bytes per upload, across levels too, so the content-hash shortcut never applies
+        upload_pdfs: list[bytes] = []
+
+        async def do_upload(i: int) -> None:
+            job = await upload(client, upload_pdfs[i], f"bench-{i}.pdf")
+            job = await wait_for_job(client, job["id"], args.wait_timeout)
+            if job["stage"] != "done":
+                raise ValueError(job.get("error"))
+
+        async def do_quiz(_: int) -> None:
+            (await client.get(f"/quiz/{pdf_id}", params={"limit": 10})).raise_for_status()
+
+        async def do_submit(i: int) -> None:
+            body = {"question_id": question_ids[i % len(question_ids)], "selected": random.choice("ABCD")}
+            (await client.post("/quiz/submit", json=body)).raise_for_status()
+
+        async def do_stats(_: int) -> None:
+            (await client.get(f"/stats/{pdf_id}")).raise_for_status()
+
+        ops = {"upload": do_upload, "quiz": do_quiz, "submit": do_submit, "stats": do_stats}
+        results = []
+        reads = [name for name in args.scenarios if name != "upload"]
+        for concurrency in args.concurrency:
+            for name in reads:
+                row = {"scenario": name, "concurrency": concurrency}
+                row.update(await run_level(ops[name], concurrency, args.requests))
+                results.append(row)
+        if "upload" in args.scenarios:
+            for level, concurrency in enumerate(args.concurrency):
+                base = (level + 1) * args.upload_requests
+                upload_pdfs[:] = [make_pdf(args.upload_pages, seed=base + i) for i in range(args.upload_requests)]
+                row = {"scenario": "upload", "concurrency": concurrency}
+                row.update(await run_level(do_upload, concurrency, args.upload_requests))
+                results.append(row)
+    config = {k: v for k, v in vars(args).items() if k != "out"}
+    write_results(args.out, "load", config, results)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario per concurrency level")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--pages", type=int, default=20, help="pages in the setup PDF")
+    parser.add_argument("--upload-pages", type=int, default=5, help="pages per PDF in the upload scenario")
+    parser.add_argument("--upload-requests", type=int, default=20, help="uploads (each ingested) per concurrency level")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--wait-timeout", type=float, default=300.0)
+    parser.add_argument("--out", help="write JSON results here")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
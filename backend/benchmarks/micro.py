@@ -0,0 +1,70 @@
+"""Micro-benchmarks for the CPU-bound steps: chunk_text, extract_text_from_pdf, _parse_json.
+
+Run from backend/: python -m benchmarks.micro [--repeat 5] [--out results/micro.json]
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from typing import Any, Callable
+
+from benchmarks.bench_chunker import synthetic_text
+from benchmarks.fake_llm import fake_questions
+from benchmarks.results import percentile, write_results
+from benchmarks.synthetic_pdf import make_pdf
+from app.services.groq import _parse_json
+from app.services.pdf_parser import chunk_text, extract_text_from_pdf
+
+
+def bench(name: str, fn: Callable[[], Any], repeat: int, units: float, unit: str) -> dict[str, Any]:
+    fn()  # warm-up
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    best = min(times)
+    return {
+        "benchmark": name,
+        "repeat": repeat,
+        "min_ms": round(best * 1000, 3),
+        "p50_ms": round(percentile(times, 0.5) * 1000, 3),
+        f"{unit}_per_s": round(units / best, 2) if best else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--text-mb", type=float, default=2.0)
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--out", help="write JSON results here")
+    args = parser.parse_args()
+
+    text = synthetic_text(int(args.text_mb * 1024 * 1024))
+    results = [bench("chunk_text", lambda: chunk_text(text), args.repeat, args.text_mb, "mb")]
+
+    fd, pdf_path = tempfile.mkstemp(suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(make_pdf(args.pages))
+        results.append(
+            bench("extract_text_from_pdf", lambda: extract_text_from_pdf(pdf_path), args.repeat, args.pages, "pages")
+        )
+    finally:
+        os.remove(pdf_path)
+
+    rng = random.Random(0)
+    clean = json.dumps({"questions": fake_questions(text[:5000], 4, rng)})
+    # What the model often sends back: fenced, with a trailing comma json_repair has to fix
+    messy = "Here you go:\n```json\n" + clean[:-2] + ",]}\n```"
+    batch = [clean, messy] * 50
+    results.append(bench("_parse_json", lambda: [_parse_json(r) for r in batch], args.repeat, len(batch), "responses"))
+
+    write_results(args.out, "micro", {k: v for k, v in vars(args).items() if k != "out"}, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Shared helpers: latency summaries and the machine-readable results file."""
+import json
+import platform
+import subprocess
+import time
+from pathlib import Path
+from typing import Any
+
+
+def percentile(samples: list[float], p: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def summarize(latencies: list[float], errors: int, wall_seconds: float) -> dict[str, Any]:
+    """Latencies in seconds in, milliseconds out."""
+    return {
+        "ok": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / wall_seconds, 2) if wall_seconds else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round(max(latencies, default=0.0) * 1000, 2),
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(path: str | None, suite: str, config: dict[str, Any], results: list[dict[str, Any]]) -> None:
+    """Print a table-ish summary and, if `path` is given, write JSON for benchmarks.compare."""
+    document = {
+        "suite": suite,
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "config": config,
+        "results": results,
+    }
+    for row in results:
+        print(json.dumps(row))
+    if path:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        Path(path).write_text(json.dumps(document, indent=2))
+        print(f"wrote {path}")
@@ -0,0 +1,53 @@
+"""Deterministic synthetic PDFs of any page count, for load tests and extraction benchmarks.
+
+Run from backend/: python -m benchmarks.synthetic_pdf out.pdf --pages 50 [--seed 1]
+"""
+import argparse
+import random
+
+import fitz  # PyMuPDF
+
+WORDS = (
+    "cell membrane transport ion molecule cytoplasm enzyme protein energy glucose photosynthesis "
+    "chlorophyll mitochondria respiration nucleus chromosome gene mutation evolution species habitat "
+    "ecosystem population predator climate carbon nitrogen water cycle pressure temperature force"
+).split()
+
+
+def page_text(rng: random.Random, words_per_page: int) -> str:
+    sentences = []
+    count = 0
+    while count < words_per_page:
+        n = rng.randint(8, 22)
+        sentences.append(" ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + ".")
+        count += n
+    # A paragraph break every few sentences, like real prose
+    return "\n\n".join(" ".join(sentences[i:i + 4]) for i in range(0, len(sentences), 4))
+
+
+def make_pdf(pages: int, words_per_page: int = 350, seed: int = 0) -> bytes:
+    """PDF bytes; a different seed gives different bytes (so content-hash dedup does not kick in)."""
+    rng = random.Random(seed)
+    doc = fitz.open()
+    try:
+        for _ in range(pages):
+            page = doc.new_page()
+            page.insert_textbox(fitz.Rect(50, 50, 545, 792), page_text(rng, words_per_page), fontsize=9)
+        return doc.tobytes()
+    finally:
+        doc.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("out")
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--words-per-page", type=int, default=350)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    with open(args.out, "wb") as f:
+        f.write(make_pdf(args.pages, args.words_per_page, args.seed))
+
+
+if __name__ == "__main__":
+    main()
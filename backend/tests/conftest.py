@@ -0,0 +1,61 @@
+"""Fixtures for tests that need a real Postgres; they are skipped when DATABASE_URL is unset."""
+import os
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, text
+
+SEED_SQL = """
+INSERT INTO users (id, email, hashed_password)
+SELECT gen_random_uuid(), 'user' || g || '@example.com', 'x' FROM generate_series(1, 50) g;
+
+INSERT INTO pdfs (id, user_id, filename, chunk_count)
+SELECT gen_random_uuid(), u.id, 'doc' || g || '.pdf', 10 FROM users u, generate_series(1, 20) g;
+
+INSERT INTO questions (id, pdf_id, question, options, answer, explanation, difficulty)
+SELECT gen_random_uuid(), p.id, 'Question ' || g, '{"A": "a", "B": "b", "C": "c", "D": "d"}', 'A', '',
+       (ARRAY['easy', 'medium', 'hard'])[1 + g % 3]
+FROM pdfs p, generate_series(1, 40) g;
+
+-- Every user has reviewed half of each PDF's questions, some due and some not
+INSERT INTO review_states (user_id, question_id, pdf_id, box, reps, lapses, due_at, last_reviewed_at)
+SELECT p.user_id, q.id, p.id, 2, 1, 0, now() + (random() - 0.5) * interval '2 days', now()
+FROM questions q JOIN pdfs p ON p.id = q.pdf_id
+WHERE q.question::text ~ '[02468]$';
+
+INSERT INTO stats_rollups (user_id, pdf_id, difficulty, total, correct)
+SELECT p.user_id, p.id, d, 10, 5 FROM pdfs p, unnest(ARRAY['easy', 'medium', 'hard']) d;
+"""
+
+
+@pytest.fixture(scope="session")
+def database_url() -> str:
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        pytest.skip("DATABASE_URL is not set")
+    return url
+
+
+@pytest.fixture(scope="session")
+def seeded_schema(database_url: str):
+    """A throwaway schema with every table created from the models and seeded; dropped afterwards."""
+    from app.database import Base
+    import app.models  # noqa: F401  (registers the tables)
+
+    schema = f"test_{uuid.uuid4().hex[:12]}"
+    admin = create_engine(database_url)
+    with admin.begin() as conn:
+        conn.execute(text(f"CREATE SCHEMA {schema}"))
+    engine = create_engine(database_url, connect_args={"options": f"-csearch_path={schema}"})
+    try:
+        Base.metadata.create_all(engine)
+        with engine.begin() as conn:
+            conn.execute(text(SEED_SQL))
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("ANALYZE"))
+        yield schema
+    finally:
+        engine.dispose()
+        with admin.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+        admin.dispose()
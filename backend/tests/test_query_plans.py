@@ -0,0 +1,87 @@
+"""EXPLAIN the quiz and stats hot queries against a seeded Postgres and check they are served by indexes.
+
+Sequential and bitmap scans are disabled for the check, so a plan without an index scan means no
+index can serve the query at all, rather than the planner preferring a seq scan on a small table.
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, event, select, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.models import PDF
+from app.services.quiz import get_questions_for_quiz
+from app.services.stats import get_overview, get_pdf_stats
+
+INDEX_SCANS = ("Index Scan", "Index Only Scan")
+
+
+async def _explain_all(database_url: str, schema: str, run) -> list[tuple[str, str]]:
+    """Run `run(db, user_id, pdf_id)`, then return (statement, plan) for every SELECT it issued."""
+    engine = create_async_engine(
+        make_url(database_url).set(drivername="postgresql+asyncpg"),
+        connect_args={
+            "server_settings": {"search_path": schema, "enable_seqscan": "off", "enable_bitmapscan": "off"}
+        },
+    )
+    issued: list[tuple[str, object]] = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            issued.append((statement, parameters))
+
+    try:
+        async with async_sessionmaker(engine, class_=AsyncSession)() as db:
+            user_id, pdf_id = (await db.execute(select(PDF.user_id, PDF.id).limit(1))).one()
+            issued.clear()
+            await run(db, user_id, pdf_id)
+            queries = list(issued)
+            issued.clear()
+            plans = []
+            for statement, parameters in queries:
+                conn = await db.connection()
+                result = await conn.exec_driver_sql("EXPLAIN " + statement, parameters)
+                plans.append((statement, "\n".join(r[0] for r in result)))
+            return plans
+    finally:
+        await engine.dispose()
+
+
+def _assert_index_only(plans: list[tuple[str, str]], expected_indexes: set[str]) -> None:
+    assert plans, "no queries were issued"
+    used = set()
+    for statement, plan in plans:
+        assert "Seq Scan" not in plan, f"sequential scan in:\n{statement}\n{plan}"
+        assert any(scan in plan for scan in INDEX_SCANS), f"no index scan in:\n{statement}\n{plan}"
+        used.update(name for name in expected_indexes if name in plan)
+    assert used == expected_indexes, f"indexes not used: {expected_indexes - used}"
+
+
+def test_quiz_selection_uses_indexes(database_url, seeded_schema):
+    async def run(db, user_id, pdf_id):
+        # A limit above the PDF's question count runs every step: due, new (both halves), not yet due
+        await get_questions_for_quiz(db, pdf_id, user_id, limit=500, pivot=0.5)
+
+    plans = asyncio.run(_explain_all(database_url, seeded_schema, run))
+    assert len(plans) == 4
+    _assert_index_only(plans, {"ix_review_states_user_id_pdf_id_due_at", "ix_questions_pdf_id_rand_key"})
+
+
+def test_stats_use_rollup_primary_key(database_url, seeded_schema):
+    async def run(db, user_id, pdf_id):
+        await get_pdf_stats(db, user_id, pdf_id)
+        await get_overview(db, user_id)
+
+    plans = asyncio.run(_explain_all(database_url, seeded_schema, run))
+    _assert_index_only(plans, {"stats_rollups_pkey"})
+
+
+@pytest.mark.parametrize("table", ["questions", "review_states", "stats_rollups"])
+def test_seeded(database_url, seeded_schema, table):
+    """Guard against an empty seed making the plan checks vacuous."""
+    engine = create_engine(database_url, connect_args={"options": f"-csearch_path={seeded_schema}"})
+    with engine.connect() as conn:
+        assert conn.scalar(text(f"SELECT count(*) FROM {table}")) > 0
+    engine.dispose()
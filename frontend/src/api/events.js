@@ -0,0 +1,25 @@
+import client from './client';
+
+const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
+
+// Server-sent events for one PDF: `progress` (ingestion job) and `questions` (new questions, no answers).
+// EventSource cannot send headers, so a short-lived token scoped to this PDF's stream goes in the query
+// string; the access token never appears in a URL. Returns a handle whose close() works before the
+// stream has opened.
+export function openPdfEvents(pdfId, { onProgress, onQuestions, onError } = {}) {
+  let source = null;
+  let closed = false;
+  client.post(`/pdfs/${pdfId}/events-token`).then(({ data }) => {
+    if (closed) return;
+    source = new EventSource(`${API_URL}/pdfs/${pdfId}/events?token=${encodeURIComponent(data.token)}`);
+    if (onProgress) source.addEventListener('progress', (e) => onProgress(JSON.parse(e.data)));
+    if (onQuestions) source.addEventListener('questions', (e) => onQuestions(JSON.parse(e.data).questions));
+    if (onError) source.onerror = onError;
+  }).catch((err) => { if (!closed && onError) onError(err); });
+  return {
+    close() {
+      closed = true;
+      if (source) source.close();
+    },
+  };
+}
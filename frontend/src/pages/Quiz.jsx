@@ -1,10 +1,12 @@
 import { useEffect, useState } from 'react';
 import { useParams } from 'react-router-dom';
 import client from '../api/client';
+import { openPdfEvents } from '../api/events';
 import QuizCard from '../components/QuizCard';
 import Timer from '../components/Timer';
 
 const QUIZ_SECONDS = 600;
+const QUIZ_SIZE = 10;
 
 export default function Quiz() {
   const { pdfId } = useParams();
@@ -15,9 +17,31 @@ export default function Quiz() {
   const [direction, setDirection] = useState('right');
 
   useEffect(() => {
-    client.get(`/quiz/${pdfId}?limit=10`).then(({ data }) => {
-      setQuestions(data);
-    }).catch(() => setQuestions([])).finally(() => setLoading(false));
+    const addQuestions = (incoming) => setQuestions((prev) => {
+      const seen = new Set(prev.map((q) => q.id));
+      const fresh = incoming.filter((q) => !seen.has(q.id));
+      return fresh.length ? [...prev, ...fresh].slice(0, QUIZ_SIZE) : prev;
+    });
+    const fetchQuiz = () => client.get(`/quiz/${pdfId}?limit=${QUIZ_SIZE}`).then(({ data }) => {
+      addQuestions(data);
+      return data.length;
+    });
+    // Questions still being ingested for this PDF stream in as each chunk is saved. The stream ends
+    // once the job is done or failed; close it then so EventSource does not keep reconnecting.
+    const source = openPdfEvents(pdfId, {
+      onQuestions: (qs) => { addQuestions(qs); setLoading(false); },
+      onProgress: (p) => { if (p.stage === 'done' || p.stage === 'failed') source.close(); },
+    });
+    // Top up unanswered questions from unused chunks, then read back whatever it stored
+    const generating = client.post('/quiz/generate', null, { params: { pdf_id: pdfId, count: QUIZ_SIZE } })
+      .catch(() => {})
+      .then(fetchQuiz)
+      .catch(() => {});
+    fetchQuiz().then((found) => {
+      if (found) setLoading(false);
+      else generating.then(() => setLoading(false));
+    }).catch(() => setLoading(false));
+    return () => source.close();
   }, [pdfId]);
 
   const submitAnswer = (questionId, selected, onResult) => {
@@ -1,6 +1,7 @@
 import { useState, useRef } from 'react';
 import { useNavigate, Link } from 'react-router-dom';
 import client from '../api/client';
+import { openPdfEvents } from '../api/events';
 
 export default function Upload() {
   const [uploading, setUploading] = useState(false);
@@ -11,6 +12,27 @@ export default function Upload() {
   const fileRef = useRef(null);
   const navigate = useNavigate();
 
+  const waitForJob = async (jobId) => {
+    for (;;) {
+      const { data } = await client.get(`/pdfs/jobs/${jobId}`);
+      if (data.stage === 'done') return data;
+      if (data.stage === 'failed') throw { response: { data: { detail: data.error } } };
+      await new Promise((r) => setTimeout(r, 2000));
+    }
+  };
+
+  // Resolves as soon as the first questions are saved (or the job finishes); polls if the stream fails
+  const waitForFirstQuestions = (job) => new Promise((resolve, reject) => {
+    const source = openPdfEvents(job.pdf_id, {
+      onQuestions: () => { source.close(); resolve(true); },
+      onProgress: (p) => {
+        if (p.stage === 'done') { source.close(); resolve(p.questions_saved > 0); }
+        if (p.stage === 'failed') { source.close(); reject({ response: { data: { detail: p.error } } }); }
+      },
+      onError: () => { source.close(); waitForJob(job.id).then(() => resolve(false), reject); },
+    });
+  });
+
   const handleFile = async (file) => {
     if (!file || file.type !== 'application/pdf') {
       setError('Please select a valid PDF file.');
@@ -23,14 +45,15 @@ export default function Upload() {
     const form = new FormData();
     form.append('file', file);
     try {
-      await client.post('/pdfs/upload', form, {
+      const { data: job } = await client.post('/pdfs/upload', form, {
         headers: { 'Content-Type': 'multipart/form-data' },
         onUploadProgress: (e) => {
           if (e.total) setProgress(Math.round((e.loaded / e.total) * 100));
         },
       });
       setProgress(100);
-      setTimeout(() => navigate('/dashboard'), 600);
+      const ready = await waitForFirstQuestions(job);
+      setTimeout(() => navigate(ready ? `/quiz/${job.pdf_id}` : '/dashboard'), 600);
     } catch (err) {
       setError(err.response?.data?.detail ?? 'Upload failed. Please try again.');
       setUploading(false);